@@ -6,23 +6,115 @@ except ImportError:
 
 import logging
 from json import load
-from os import environ
+from os import environ, stat
+from time import monotonic
 
-with open(environ["SETTINGS"]) as f:
-    CONFIG = toml_load(f.read())
+SETTINGS = environ["SETTINGS"]
+LOG = logging.getLogger("Config")
 
-for i in ("ADMIN_USERS", "NO_LIMIT_USERS"):
-    if i not in CONFIG and f"{i}_JSON" in CONFIG:
-        with open(CONFIG[f"{i}_JSON"]) as f:
-            CONFIG[i] = load(f)
+# Other modules keep a reference to this dict, so it gets updated in
+# place on reload instead of being replaced.
+CONFIG = {}
 
-# set a bunch of defaults to make the remaining code more readable
-for i in ("ADMIN_USERS", "NO_LIMIT_USERS", "SETUP_IDS"):
-    if i not in CONFIG:
-        CONFIG[i] = []
+_permissions = {}
+_reload_hooks = []
+_mtimes = {}
+_last_check = 0
 
-if "NOTIFIER" not in CONFIG:
-    CONFIG["NOTIFIER"] = {}
+
+def _load():
+    with open(SETTINGS) as f:
+        config = toml_load(f.read())
+
+    files = [SETTINGS]
+    for i in ("ADMIN_USERS", "NO_LIMIT_USERS"):
+        if i not in config and f"{i}_JSON" in config:
+            files.append(config[f"{i}_JSON"])
+            with open(config[f"{i}_JSON"]) as f:
+                config[i] = load(f)
+
+    # set a bunch of defaults to make the remaining code more readable
+    for i in ("ADMIN_USERS", "NO_LIMIT_USERS", "SETUP_IDS"):
+        if i not in config:
+            config[i] = []
+
+    if "NOTIFIER" not in config:
+        config["NOTIFIER"] = {}
+
+    return config, files
+
+
+def _get_mtimes(files):
+    mtimes = {}
+    for path in files:
+        try:
+            mtimes[path] = stat(path).st_mtime_ns
+        except OSError:
+            mtimes[path] = None
+    return mtimes
+
+
+def reload_config():
+    """Load the settings and user lists again. If anything fails, we
+    keep running with the old configuration."""
+    global _permissions, _mtimes
+
+    config, files = _load()
+    permissions = {
+        i: frozenset(user.lower() for user in config[i])
+        for i in ("ADMIN_USERS", "NO_LIMIT_USERS")
+    }
+
+    # There is no i/o between these statements, so other greenlets
+    # can't see a half-updated config.
+    CONFIG.clear()
+    CONFIG.update(config)
+    _permissions = permissions
+    _mtimes = _get_mtimes(files)
+
+    for hook in _reload_hooks:
+        hook()
+
+
+def maybe_reload_config():
+    """Reload the config if any of the files has changed. Checks at
+    most every CONFIG_CHECK_INTERVAL seconds."""
+    global _last_check
+
+    now = monotonic()
+    if now - _last_check < CONFIG.get("CONFIG_CHECK_INTERVAL", 5):
+        return
+    _last_check = now
+
+    if _get_mtimes(_mtimes.keys()) == _mtimes:
+        return
+
+    LOG.warning("configuration has changed, reloading")
+    reload_config_safely()
+
+
+def reload_config_safely(*args):
+    # also usable as signal handler
+    try:
+        reload_config()
+    except Exception:
+        LOG.exception("could not reload configuration, keeping the old one")
+
+
+def on_config_reload(hook):
+    _reload_hooks.append(hook)
+    return hook
+
+
+def is_admin_user(userid):
+    return userid.lower() in _permissions["ADMIN_USERS"]
+
+
+def is_no_limit_user(userid):
+    return userid.lower() in _permissions["NO_LIMIT_USERS"]
+
+
+reload_config()
 
 logging.basicConfig(
     format="[%(levelname)s %(name)s] %(message)s",
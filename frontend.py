@@ -1,19 +1,19 @@
 import os
 import random
+import signal
 import socket
+import threading
 from base64 import urlsafe_b64encode
-from collections import defaultdict
 from datetime import datetime, timezone
 from hashlib import sha256
-from os.path import abspath, dirname, join
 from secrets import token_hex
-from subprocess import check_output
-from typing import Iterable
+from time import sleep
 from urllib.parse import urlencode
 
 import requests
 from flask import (
     Flask,
+    Response,
     abort,
     flash,
     g,
@@ -21,120 +21,158 @@ from flask import (
     redirect,
     render_template,
     request,
+    send_from_directory,
     session,
     url_for,
 )
-from prometheus_client import generate_latest
-from prometheus_client.core import REGISTRY, GaugeMetricFamily
-from prometheus_client.metrics_core import Metric
-from prometheus_client.registry import Collector
 from werkzeug.middleware.proxy_fix import ProxyFix
 
-from conf import CONFIG
-from ib_hosted import get_scoped_api_key, ib, update_asset_userdata
+from conf import CONFIG, maybe_reload_config, on_config_reload, reload_config_safely
+from ib_hosted import get_scoped_api_key, ib, send_node_message, update_asset_userdata
 from notifier import Notifier
 from redis_session import RedisSessionStore
 from util import (
     State,
-    admin_required,
+    asset_filename,
     cached_asset_name,
-    error,
+    find_duplicates,
     get_all_live_assets,
     get_asset,
-    get_assets,
     get_assets_awaiting_moderation,
     get_random,
-    get_user_assets,
     is_within_timeframe,
-    login_required,
     parse_asset,
+    shuffled_page,
+)
+from util.admission import AdmissionControl
+from util.changelog import get_epoch, get_live_delta, update_live_set
+from util.circuit import CircuitOpen
+from util.compress import compress_response
+from util.devices import get_device_list, known_device_ids, run_poller
+from util.events import BROKER
+from util.ib_hosted import AssetNotFound
+from util.mirror import MIRROR
+from util.page_cache import cached_anonymous_page
+from util.playstats import get_play_stats, record_plays
+from util.profiler import (
+    CLOCKS,
+    MAX_REQUEST_SECONDS,
+    MIN_INTERVAL,
+    Profiler,
+    ProfilerBusy,
+    profile_on_signal,
 )
+from util.proofs import LAST_SHOWN_COUNT, get_last_shown, parse_proofs, store_proofs
+from util.ratelimit import RateLimited, take_token, with_backoff
 from util.redis import REDIS
+from util.release import DEPLOYED, RELEASE, announce_release, get_current_release
 from util.sso import DEFAULT_SSO_PROVIDER, SSO_CONFIG
+from util.sso.client import run_hook, sso_request
+from util.static import bundle_urls, fingerprint_static_url
+from util.web import (
+    admin_required,
+    error,
+    get_user_assets,
+    login_required,
+    rate_limited,
+)
 
 app = Flask(
     __name__,
     static_folder=CONFIG.get("STATIC_PATH", "static"),
 )
 app.secret_key = CONFIG.get("URL_KEY")
-app.wsgi_app = ProxyFix(app.wsgi_app)
+app.wsgi_app = AdmissionControl(ProxyFix(app.wsgi_app))
+
+
+@on_config_reload
+def copy_config():
+    for copy_key in (
+        "MAX_UPLOADS",
+        "ROOMS",
+        "TIME_MAX",
+        "TIME_MIN",
+    ):
+        app.config[copy_key] = CONFIG[copy_key]
+
+
+copy_config()
+
+
+def install_signal_handlers():
+    # Reload the config on SIGHUP, in addition to reloading it when the
+    # files change. Send it to the workers, sending it to the gunicorn
+    # master process will restart all workers instead. gunicorn resets
+    # signal handlers in every worker it starts, so this gets called
+    # from gunicorn.conf.py, not at import time (which might happen in
+    # the master, with --preload).
+    signal.signal(signal.SIGHUP, reload_config_safely)
+    signal.signal(signal.SIGUSR2, profile_on_signal)
 
-for copy_key in (
-    "MAX_UPLOADS",
-    "ROOMS",
-    "TIME_MAX",
-    "TIME_MIN",
-):
-    app.config[copy_key] = CONFIG[copy_key]
 
 socket.setdefaulttimeout(3)  # for mqtt
 
-APP_STARTUP_TIME = int(datetime.now().timestamp())
-VERSION = ""
-# try to determine which git revision we're running by probing stuff
-try:
-    with open(join(abspath(dirname(__file__)), ".bundlewrap_git_deploy")) as f:
-        VERSION = f.read().strip()[:8]
-except Exception:
-    try:
-        VERSION = check_output(
-            ["git", "rev-parse", "--short", "HEAD"]
-        ).strip()
-    except Exception:
-        pass
+# The release is determined at deploy time (see mkrelease.py) and is
+# the same for all workers, so recycled workers won't make slideshows
+# reload. Only a new release does.
+VERSION = RELEASE
+announce_release(RELEASE, DEPLOYED)
 
+# Serve the last known asset and device lists right away, even if
+# redis got restarted or info-beamer can't be reached right now.
+ib.load_snapshots()
 
-class SubmissionsCollector(Collector):
-    def collect(self) -> Iterable[Metric]:
-        counts = defaultdict(int)
-        for a in get_assets():
-            counts[a.state] += 1
-        g = GaugeMetricFamily(
-            "submissions", "Counts of content submissions", labels=["state"]
-        )
-        for state in State:
-            # Add any states that we know about but have 0 assets in them
-            if state.value not in counts.keys():
-                counts[state.value] = 0
-        for s, c in counts.items():
-            g.add_metric([s], c)
-        yield g
-
-
-class InfobeamerCollector(Collector):
-    """Prometheus collector for general infobeamer metrics available from the hosted API."""
-
-    def collect(self) -> Iterable[Metric]:
-        # IBHostedCached will cache this for us
-        devices = ib.get("device/list", cached=True)["devices"]
-        yield GaugeMetricFamily("devices", "Infobeamer devices", len(devices))
-        yield GaugeMetricFamily(
-            "devices_online",
-            "Infobeamer devices online",
-            len([d for d in devices if d["is_online"]]),
-        )
-        m = GaugeMetricFamily(
-            "device_model", "Infobeamer device models", labels=["model"]
-        )
-        counts = defaultdict(int)
-        for d in devices:
-            if d.get("hw"):
-                counts[d["hw"]["model"]] += 1
-            else:
-                counts["unknown"] += 1
-        for model, count in counts.items():
-            m.add_metric([model], count)
-        yield m
+_warm_up_started = threading.Event()
 
 
-REGISTRY.register(SubmissionsCollector())
-REGISTRY.register(InfobeamerCollector())
+def warm_up():
+    # Runs in the background, after the first request. We don't start it
+    # at import time, because gunicorn might fork after importing us.
+    # Only the first worker of each node warms up after a deploy, all
+    # workers of a node share their mirror.
+    if not REDIS.set(
+        f"lock:warmup:{socket.gethostname()}:{RELEASE}", os.getpid(), nx=True, ex=3600
+    ):
+        return
+    try:
+        with_backoff(ib.get, "device/list", True)
+        assets = with_backoff(get_all_live_assets, True)
+    except Exception:
+        app.logger.exception("cache warm-up failed")
+        return
+    for asset in assets:
+        if os.path.exists(MIRROR.local_path(asset_filename(asset))):
+            continue
+        # Downloads get paced by their own bucket, so they only use up
+        # a small part of the upstream:read bucket and display and
+        # moderation requests don't get rate limited after a restart.
+        while True:
+            try:
+                take_token("upstream:warmup")
+                break
+            except RateLimited as e:
+                sleep(e.retry_after)
+        try:
+            with_backoff(cached_asset_name, asset)
+        except Exception:
+            app.logger.exception(f"could not mirror asset {asset.id}")
+
 
 app.session_interface = RedisSessionStore()
+app.url_defaults(fingerprint_static_url)
+app.add_template_global(bundle_urls)
+app.after_request(compress_response)
 
 
 @app.before_request
 def before_request():
+    maybe_reload_config()
+
+    if not _warm_up_started.is_set():
+        _warm_up_started.set()
+        threading.Thread(target=warm_up, daemon=True).start()
+        threading.Thread(target=run_poller, daemon=True).start()
+
     provider = session.get("oauth2_provider")
     userinfo = session.get("oauth2_userinfo")
 
@@ -215,7 +253,18 @@ def login(provider):
     )
 
 
+def rename_user_assets(userid, username):
+    # update assets display name if it changed
+    assets = ib.get("asset/list")["assets"]
+    for asset in assets:
+        if asset["userdata"].get("userid") != userid:
+            continue
+        if asset["userdata"].get("username") != username:
+            update_asset_userdata(asset, username=username)
+
+
 @app.route("/login/callback/<provider>")
+@rate_limited
 def oauth2_callback(provider):
     if g.userid:
         return redirect(url_for("dashboard"))
@@ -252,23 +301,38 @@ def oauth2_callback(provider):
         params["code_verifier"] = session["oauth2_state"]
         headers["Content-Type"] = "application/x-www-form-urlencoded"
 
-    r = requests.post(
-        SSO_CONFIG[provider]["token_url"],
-        data=params,
-        headers=headers,
-    )
-    if r.status_code != 200:
-        abort(400)
-    oauth2_token = r.json().get("access_token")
-
-    r = requests.get(
-        SSO_CONFIG[provider]["userinfo_url"],
-        headers={
-            "Authorization": f"Bearer {oauth2_token}",
-            "Accept": "application/json",
-        },
-    )
-    userinfo_json = r.json()
+    try:
+        r = sso_request(
+            provider,
+            "token",
+            "POST",
+            SSO_CONFIG[provider]["token_url"],
+            data=params,
+            headers=headers,
+        )
+        if r.status_code != 200:
+            abort(400)
+        oauth2_token = r.json().get("access_token")
+
+        r = sso_request(
+            provider,
+            "userinfo",
+            "GET",
+            SSO_CONFIG[provider]["userinfo_url"],
+            headers={
+                "Authorization": f"Bearer {oauth2_token}",
+                "Accept": "application/json",
+            },
+        )
+        r.raise_for_status()
+        userinfo_json = r.json()
+    except requests.RequestException as e:
+        app.logger.warning(f"login with {provider} failed: {e!r}")
+        flash(
+            f"Could not reach {SSO_CONFIG[provider]['display_name']}, please try again.",
+            "danger",
+        )
+        return redirect(url_for("index"))
 
     if not SSO_CONFIG[provider]["functions"]["login_allowed"](userinfo_json):
         flash("You are not allowed to log in.", "warning")
@@ -287,13 +351,7 @@ def oauth2_callback(provider):
     session["oauth2_provider"] = provider
     session["oauth2_userinfo"] = userinfo_json
 
-    # update assets display name if it changed
-    assets = ib.get("asset/list")["assets"]
-    for asset in assets:
-        if asset["userdata"].get("userid") != userid:
-            continue
-        if asset["userdata"].get("username") != username:
-            update_asset_userdata(asset, username=username)
+    run_hook("renaming assets", rename_user_assets, userid, username)
 
     if "redirect_after_login" in session:
         return redirect(session["redirect_after_login"])
@@ -308,43 +366,82 @@ def logout():
 
 
 @app.route("/")
+@cached_anonymous_page
 def index():
     return render_template("index.jinja")
 
 
 @app.route("/last")
+@cached_anonymous_page
 def last():
     return render_template("last.jinja")
 
 
 @app.route("/faq")
+@cached_anonymous_page
 def faq():
     return render_template("faq.jinja", **CONFIG["FAQ"])
 
 
-@app.route("/interrupt")
-def saal():
+def interrupt_allowed():
     auth = CONFIG.get("INTERRUPT_KEY")
     if not auth:
         abort(404)
-    if not g.user_is_admin and request.args.get("auth") != auth:
-        abort(401)
+    return g.user_is_admin or request.values.get("auth") == auth
 
-    interrupt_key = get_scoped_api_key(
-        [
-            {
-                "Action": "device:node-message",
-                "Condition": {"StringEquals": {"message:path": "root/remote/trigger"}},
-                "Effect": "allow",
-            }
-        ],
-        expire=900,
-        uses=20,
-    )
+
+@app.route("/interrupt")
+def saal():
+    if not interrupt_allowed():
+        abort(401)
     return render_template(
         "interrupt.jinja",
-        interrupt_key=interrupt_key,
+        interrupt_auth=request.args.get("auth", ""),
+    )
+
+
+@app.route("/api/devices")
+def api_devices():
+    # the interrupt page shows which rooms are online
+    if not interrupt_allowed():
+        abort(401)
+    resp = jsonify(get_device_list())
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+
+@app.route("/api/interrupt", methods=["POST"])
+def api_interrupt():
+    if not interrupt_allowed():
+        abort(401)
+
+    data = request.values.get("data")
+    device_ids = {
+        int(device_id)
+        for value in request.values.getlist("device_id")
+        for device_id in value.split(",")
+        if device_id.strip().isdigit()
+    }
+    # only send interrupts which are configured for the room
+    rooms = [
+        room
+        for room in CONFIG["ROOMS"]
+        if room["device_id"] in device_ids
+        and any(i["data"] == data for i in room.get("interrupts", []))
+    ]
+    if not rooms:
+        return error("No matching rooms")
+
+    results = send_node_message(
+        [room["device_id"] for room in rooms], "root/remote/trigger", data
     )
+    for room, result in zip(rooms, results):
+        result["room"] = room["name"]
+        if not result["ok"]:
+            app.logger.error(
+                f"interrupt {data} for {room['name']} failed: {result['error']}"
+            )
+    return jsonify(results=results)
 
 
 @app.route("/dashboard")
@@ -373,6 +470,7 @@ def content_awaiting_moderation():
 
 @app.route("/content/upload", methods=["POST"])
 @login_required
+@rate_limited
 def content_upload():
     if not g.user_is_admin and not g.user_without_limits:
         max_uploads = CONFIG["MAX_UPLOADS"]
@@ -438,10 +536,11 @@ def content_upload():
 
 @app.route("/content/review/<int:asset_id>", methods=["POST"])
 @login_required
+@rate_limited
 def content_request_review(asset_id):
     try:
-        asset = ib.get(f"asset/{asset_id}")
-    except Exception:
+        asset = ib.get_asset(asset_id)
+    except AssetNotFound:
         abort(404)
 
     if asset["userdata"].get("userid") != g.userid:
@@ -455,6 +554,11 @@ def content_request_review(asset_id):
         asset=asset["filetype"].capitalize(),
     )
 
+    duplicates = []
+    if not (g.user_is_admin or g.user_without_limits):
+        duplicates = find_duplicates(parse_asset(asset))
+    duplicate_of = [{"id": a.id, "state": a.state} for a in duplicates]
+
     if g.user_is_admin:
         update_asset_userdata(asset, state=State.CONFIRMED, moderated_by="ADMIN")
         app.logger.warning(
@@ -473,13 +577,35 @@ def content_request_review(asset_id):
         moderation_message += (
             "It was automatically confirmed because user is on the no-limits list."
         )
+    elif duplicates and CONFIG.get("DUPLICATES") == "resolve":
+        # same content, same decision
+        original = duplicates[0]
+        update_asset_userdata(
+            asset,
+            state=original.state,
+            moderated_by="DUPLICATE",
+            duplicate_of=duplicate_of,
+        )
+        app.logger.warning(
+            "{} is a duplicate of {}, setting state to {}".format(
+                asset["id"], original.id, original.state
+            )
+        )
+        moderation_message += (
+            f"It is a duplicate of asset {original.id}, so it was automatically "
+            f"set to {original.state}."
+        )
     else:
         moderation_url = url_for("content_moderate", asset_id=asset_id, _external=True)
         app.logger.info(
             "moderation url for {} is {}".format(asset["id"], moderation_url)
         )
-        update_asset_userdata(asset, state=State.REVIEW)
+        update_asset_userdata(asset, state=State.REVIEW, duplicate_of=duplicate_of)
         moderation_message += f"Check it at {moderation_url}"
+        if duplicates:
+            moderation_message += " - it looks like a duplicate of {}.".format(
+                ", ".join(f"asset {a.id} ({a.state})" for a in duplicates)
+            )
 
     n = Notifier()
     n.message(moderation_message, asset=parse_asset(asset))
@@ -492,7 +618,7 @@ def content_request_review(asset_id):
 def content_moderate(asset_id):
     try:
         asset = get_asset(asset_id)
-    except Exception:
+    except AssetNotFound:
         app.logger.info(
             f"request to moderate asset {asset_id} failed because asset does not exist"
         )
@@ -514,8 +640,8 @@ def content_moderate(asset_id):
 @admin_required
 def content_moderate_result(asset_id, result):
     try:
-        asset = ib.get(f"asset/{asset_id}")
-    except Exception:
+        asset = ib.get_asset(asset_id)
+    except AssetNotFound:
         app.logger.info(
             f"request to moderate asset {asset_id} failed because asset does not exist"
         )
@@ -533,8 +659,10 @@ def content_moderate_result(asset_id, result):
         update_asset_userdata(asset, state=State.CONFIRMED, moderated_by=g.username)
         sso_provider = asset["userdata"]["userid"].split(":")[0]
         if "after_confirm_action" in SSO_CONFIG[sso_provider]["functions"]:
-            SSO_CONFIG[sso_provider]["functions"]["after_confirm_action"](
-                get_asset(asset_id)
+            run_hook(
+                "after_confirm_action",
+                SSO_CONFIG[sso_provider]["functions"]["after_confirm_action"],
+                parse_asset(asset),
             )
     else:
         app.logger.info("Asset {} was rejected".format(asset["id"]))
@@ -545,10 +673,11 @@ def content_moderate_result(asset_id, result):
 
 @app.route("/content/<int:asset_id>", methods=["POST"])
 @login_required
+@rate_limited
 def content_update(asset_id):
     try:
-        asset = ib.get(f"asset/{asset_id}")
-    except Exception:
+        asset = ib.get_asset(asset_id)
+    except AssetNotFound:
         abort(404)
 
     starts = request.values.get("starts", type=int)
@@ -559,6 +688,8 @@ def content_update(asset_id):
 
     try:
         update_asset_userdata(asset, starts=starts, ends=ends)
+    except (RateLimited, CircuitOpen):
+        raise
     except Exception as e:
         app.logger.error(f"content_update({asset_id}) {repr(e)}")
         return error("Cannot update")
@@ -568,24 +699,21 @@ def content_update(asset_id):
 
 @app.route("/content/<int:asset_id>", methods=["DELETE"])
 @login_required
+@rate_limited
 def content_delete(asset_id):
     try:
-        asset = ib.get(f"asset/{asset_id}")
-    except Exception:
+        asset = ib.get_asset(asset_id)
+    except AssetNotFound:
         abort(404)
 
     if asset["userdata"].get("userid") != g.userid:
         return error("Cannot delete")
 
     try:
-        asset_filename = cached_asset_name(parse_asset(asset))
-        if asset_filename:
-            asset_path = os.path.join(
-                CONFIG.get("STATIC_PATH", "static"), asset_filename
-            )
-            if os.path.exists(asset_path):
-                os.remove(asset_path)
+        MIRROR.remove(asset_filename(parse_asset(asset)))
         update_asset_userdata(asset, state=State.DELETED)
+    except (RateLimited, CircuitOpen):
+        raise
     except Exception as e:
         app.logger.error(f"content_delete({asset_id}) {repr(e)}")
         return error("Cannot delete")
@@ -597,93 +725,224 @@ def content_delete(asset_id):
 def content_live():
     no_time_filter = request.values.get("all")
     assets = get_all_live_assets(no_time_filter=no_time_filter)
-    random.shuffle(assets)
-    resp = jsonify([a.to_dict(mod_data=g.user_is_admin) for a in assets])
+
+    limit = request.values.get("limit", type=int)
+    if limit is None:
+        # legacy behaviour, return everything in one go
+        random.shuffle(assets)
+        resp = jsonify([a.to_dict(mod_data=g.user_is_admin) for a in assets])
+        resp.headers["Cache-Control"] = "no-cache"
+        return resp
+
+    seed = request.values.get("seed", type=int)
+    if seed is None or not 0 <= seed < 2**64:
+        seed = random.getrandbits(32)
+    limit = max(1, min(limit, CONFIG.get("LIVE_PAGE_SIZE_MAX", 100)))
+
+    page, next_cursor = shuffled_page(
+        assets, seed, cursor=request.values.get("cursor"), limit=limit
+    )
+    resp = jsonify(
+        assets=[a.to_dict(mod_data=g.user_is_admin) for a in page],
+        next=next_cursor,
+        seed=seed,
+        total=len(assets),
+    )
     resp.headers["Cache-Control"] = "no-cache"
     return resp
 
 
 @app.route("/metrics")
 def metrics():
-    return generate_latest()
+    # prometheus_client and the collectors only get loaded once we get
+    # scraped, not in every worker
+    from util.metrics import generate_metrics
+
+    return generate_metrics()
 
 
 @app.route("/slideshow")
+@cached_anonymous_page
 def slideshow():
-    return render_template("slideshow.jinja", APP_STARTUP_TIME=APP_STARTUP_TIME)
+    return render_template(
+        "slideshow.jinja",
+        APP_RELEASE=get_current_release(),
+        SLIDESHOW_CONFIG={
+            "cache_mb": CONFIG.get("SLIDESHOW_CACHE_MB", 500),
+            "preload": CONFIG.get("SLIDESHOW_PRELOAD", 3),
+        },
+    )
+
+
+@app.route("/slideshow-sw.js")
+def slideshow_service_worker():
+    # Service workers can only control pages below the path they are
+    # served from, so this can't live in /static.
+    resp = send_from_directory(app.static_folder, "slideshow-sw.js")
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
 
 
 @app.route("/api/slideshow/content")
 def api_slideshow_content():
     assets = [a.to_dict() for a in get_all_live_assets()]
-    resp = jsonify(
-        {
-            a["id"]: {
-                "url": a["url"],
-                "type": a["filetype"],
-            }
-            for a in assets
+    content = {
+        str(a["id"]): {
+            "url": a["url"],
+            "type": a["filetype"],
         }
-    )
+        for a in assets
+    }
+    version = update_live_set(content)
+
+    since = request.values.get("since", type=int)
+    if since is None:
+        # legacy clients get the plain id->content mapping
+        resp = jsonify(content)
+    else:
+        delta = get_live_delta(since, request.values.get("epoch"))
+        if delta is None:
+            delta = {
+                "version": version,
+                "epoch": get_epoch(),
+                "full": True,
+                "content": content,
+            }
+        resp = jsonify(delta)
     resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["X-Content-Version"] = str(version)
+    return resp
+
+
+@app.route("/api/events")
+def api_events():
+    # Server-Sent Events. Clients get notified about content changes and
+    # deploys, so they don't have to poll as often.
+    resp = Response(BROKER.stream(), mimetype="text/event-stream")
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["X-Accel-Buffering"] = "no"
     return resp
 
 
 @app.route("/api/startup")
 def app_startup_time():
-    return str(APP_STARTUP_TIME)
-
-
-# @app.route("/content/last")
-# def content_last():
-#    assets = get_all_live_assets()
-#    asset_by_id = dict((asset["id"], asset) for asset in assets)
-#
-#    last = {}
-#
-#    for room in CONFIG["ROOMS"]:
-#        proofs = [
-#            json.loads(data)
-#            for data in r.zrange("last:{}".format(room["device_id"]), 0, -1)
-#        ]
-#
-#        last[room["name"]] = room_last = []
-#        for proof in reversed(proofs):
-#            asset = asset_by_id.get(proof["asset_id"])
-#            if asset is None:
-#                continue
-#            room_last.append(
-#                {
-#                    "id": proof["id"],
-#                    "user": asset["userdata"]["user"],
-#                    "filetype": asset["filetype"],
-#                    "shown": int(proof["ts"]),
-#                    "thumb": asset["thumb"],
-#                    "url": url_for("static", filename=cached_asset_name(asset)),
-#                }
-#            )
-#            if len(room_last) > 10:
-#                break
-#
-#    resp = jsonify(
-#        last=[[room["name"], last.get(room["name"], [])] for room in CONFIG["ROOMS"]]
-#    )
-#    resp.headers["Cache-Control"] = "no-cache"
-#    return resp
-#
-#
-# @app.route("/proof", methods=["POST"])
-# def proof():
-#    proofs = [(json.loads(row), row) for row in request.stream.read().split("\n")]
-#    device_ids = set()
-#    p = r.pipeline()
-#    for proof, row in proofs:
-#        p.zadd("last:{}".format(proof["device_id"]), row, proof["ts"])
-#        device_ids.add(proof["device_id"])
-#    for device_id in device_ids:
-#        p.zremrangebyscore(f"last:{device_id}", 0, time.time() - 1200)
-#    p.execute()
-#    return "ok"
+    resp = app.response_class(get_current_release(), mimetype="text/plain")
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+
+@app.route("/content/last")
+def content_last():
+    def compute(room_proofs):
+        asset_by_id = {a.id: a for a in get_all_live_assets(no_time_filter=True)}
+        last = {}
+        for room, proofs in room_proofs.items():
+            last[room] = room_last = []
+            for proof in proofs:
+                asset = asset_by_id.get(proof["asset_id"])
+                if asset is None:
+                    continue
+                room_last.append(
+                    {
+                        "id": proof["id"] or f"{proof['device_id']}-{proof['ts']}",
+                        "username": asset.username,
+                        "filetype": asset.filetype,
+                        "shown": int(proof["ts"]),
+                        "thumb": asset.thumb,
+                        "url": url_for("static", filename=cached_asset_name(asset)),
+                    }
+                )
+                if len(room_last) >= LAST_SHOWN_COUNT:
+                    break
+        return [[room["name"], last.get(room["name"], [])] for room in CONFIG["ROOMS"]]
+
+    resp = jsonify(last=get_last_shown(compute))
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+
+@app.route("/proof", methods=["POST"])
+def proof():
+    # Devices post their proofs of play here, one JSON object per line.
+    proof_key = CONFIG.get("PROOF_KEY")
+    if not proof_key:
+        abort(404)
+    if request.args.get("key") != proof_key:
+        abort(401)
+
+    # content_length is not set for chunked requests, so read at most
+    # one byte more than we accept
+    max_size = CONFIG.get("PROOF_MAX_SIZE", 1024 * 1024)
+    if (request.content_length or 0) > max_size:
+        abort(413)
+    body = request.stream.read(max_size + 1)
+    if len(body) > max_size:
+        abort(413)
+
+    proofs, invalid = parse_proofs(body.decode("utf-8", "replace").split("\n"))
+    known = known_device_ids()
+    unknown = len([entry for entry in proofs if entry["device_id"] not in known])
+    proofs = [entry for entry in proofs if entry["device_id"] in known]
+    record_plays(store_proofs(proofs))
+    if invalid or unknown:
+        app.logger.warning(
+            f"ignored {invalid} invalid proofs of play and {unknown} from unknown devices"
+        )
+    return jsonify(ok=True, accepted=len(proofs), invalid=invalid, unknown=unknown)
+
+
+@app.route("/api/stats")
+@admin_required
+def api_stats():
+    hours = max(1, request.values.get("hours", 24, type=int))
+    resp = jsonify(get_play_stats(hours=hours))
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+
+@app.errorhandler(RateLimited)
+def rate_limited_error(e):
+    app.logger.warning(str(e))
+    response = jsonify(error="Too many requests, please try again later")
+    response.status_code = 429
+    response.headers["Retry-After"] = str(e.retry_after)
+    return response
+
+
+@app.errorhandler(CircuitOpen)
+def circuit_open_error(e):
+    app.logger.warning(str(e))
+    response = jsonify(error="info-beamer is unavailable, please try again later")
+    response.status_code = 503
+    response.headers["Retry-After"] = str(e.retry_after)
+    return response
+
+
+@app.route("/api/profile")
+@admin_required
+def profile():
+    seconds = min(request.values.get("seconds", 10, type=float), MAX_REQUEST_SECONDS)
+    clock = request.values.get("clock", "cpu")
+    if clock not in CLOCKS:
+        return error(f"clock must be one of {', '.join(CLOCKS)}")
+
+    interval = request.values.get("interval", 0.005, type=float)
+    if not MIN_INTERVAL <= interval <= 1:
+        return error(f"interval must be between {MIN_INTERVAL} and 1 seconds")
+    if not seconds > 0:
+        return error("seconds must be positive")
+
+    try:
+        with Profiler(interval=interval, clock=clock) as p:
+            sleep(seconds)
+    except (ProfilerBusy, ValueError, OSError) as e:
+        return error(str(e))
+
+    return Response(
+        p.collapsed(),
+        mimetype="text/plain",
+        headers={"X-Worker-Pid": str(os.getpid())},
+    )
 
 
 @app.route("/robots.txt")
@@ -692,4 +951,5 @@ def robots_txt():
 
 
 if __name__ == "__main__":
+    install_signal_handlers()
     app.run(port=8080)
@@ -0,0 +1,9 @@
+# gunicorn reads this from its working directory.
+
+
+def post_worker_init(worker):
+    # runs in every worker, after gunicorn has set up its own signal
+    # handlers
+    from frontend import install_signal_handlers
+
+    install_signal_handlers()
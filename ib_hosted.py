@@ -1,6 +1,11 @@
+from concurrent.futures import ThreadPoolExecutor
 from json import dumps as json_dumps
+from time import monotonic, time
 
+from util import State
+from util.events import publish_event
 from util.ib_hosted import ib
+from util.transitions import observe, record_transition
 
 
 def get_scoped_api_key(statements, expire=60, uses=16):
@@ -17,7 +22,54 @@ def get_scoped_api_key(statements, expire=60, uses=16):
     )["api_key"]
 
 
+def affects_live_content(before, after):
+    """Whether a change of an asset's userdata might add it to or
+    remove it from the live content."""
+    if State.CONFIRMED not in (before.get("state"), after.get("state")):
+        return False
+    return any(before.get(k) != after.get(k) for k in ("state", "starts", "ends"))
+
+
 def update_asset_userdata(asset, **kw):
     userdata = asset["userdata"]
+    before = dict(userdata)
     userdata.update(kw)
     ib.post("asset/{}".format(asset["id"]), userdata=json_dumps(userdata))
+    ib.update_asset(asset)
+    if "state" in kw:
+        previous = record_transition(asset["id"], kw["state"])
+        if kw["state"] in (State.CONFIRMED, State.REJECTED) and "review" in previous:
+            observe("moderation_review_wait_seconds", time() - previous["review"])
+    # the cached asset list is stale now, make sure clients which react
+    # to the event below get the current list
+    ib.invalidate("asset/list")
+    # /api/events is public, so don't tell everyone who uploaded it.
+    # Dashboards refresh if it's one of their assets. Slideshows and the
+    # scheduler only need to know if the live content might change.
+    publish_event("asset", asset_id=asset["id"])
+    if affects_live_content(before, userdata):
+        publish_event("content", asset_id=asset["id"])
+
+
+def send_node_message(device_ids, path, data):
+    """Send a node message to all given devices at the same time.
+    Returns the result for every device, in the order they were given."""
+
+    def send(device_id):
+        start = monotonic()
+        try:
+            ib.post(f"device/{device_id}/node/{path}", data=data)
+            error = None
+        except Exception as e:
+            error = repr(e)
+        return {
+            "device_id": device_id,
+            "ok": error is None,
+            "error": error,
+            "ms": int((monotonic() - start) * 1000),
+        }
+
+    if not device_ids:
+        return []
+    with ThreadPoolExecutor(max_workers=len(device_ids)) as pool:
+        return list(pool.map(send, device_ids))
@@ -0,0 +1,110 @@
+# Shows how long importing the frontend and the batch tools takes, and
+# which modules are responsible. Importing them talks to redis, so the
+# targets get imported with settings.example.toml and a redis client
+# which never connects anywhere. The numbers don't include network
+# round trips, and running this never writes to a real redis.
+#
+#   python3 importtime.py                        # report
+#   python3 importtime.py --save importtime.json # remember as baseline
+#   python3 importtime.py --baseline importtime.json
+#
+# With --baseline, the exit code is 1 if any target got more than
+# --tolerance percent slower than in the baseline.
+import os
+import subprocess
+import sys
+from argparse import ArgumentParser
+from collections import defaultdict
+from json import dump, load
+
+TARGETS = ("syncer", "scheduler", "frontend")
+# Imported before the target, so it can be replaced with a client which
+# answers every command with None. Its own import time gets added to
+# the target's.
+BOOTSTRAP_IMPORTS = ("redis",)
+BOOTSTRAP = """
+import redis
+
+class OfflineRedis(redis.Redis):
+    def execute_command(self, *args, **options):
+        return None
+
+redis.Redis = OfflineRedis
+import {target}
+"""
+
+
+def measure(target):
+    """Returns the time (in ms) importing the target took, and how much
+    of that was spent in each top-level package."""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", BOOTSTRAP.format(target=target)],
+        cwd=directory,
+        env=os.environ | {"SETTINGS": os.path.join(directory, "settings.example.toml")},
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        sys.exit(f"importing {target} failed:\n{result.stderr}")
+
+    total = 0
+    packages = defaultdict(float)
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        own, cumulative, name = line.removeprefix("import time:").split("|")
+        # nested imports are indented
+        top_level = not name.removeprefix(" ").startswith(" ")
+        name = name.strip()
+        packages[name.split(".")[0]] += int(own) / 1000
+        if top_level and name in (target, *BOOTSTRAP_IMPORTS):
+            total += int(cumulative) / 1000
+    return total, packages
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("targets", nargs="*", default=TARGETS)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--save", metavar="FILE")
+    parser.add_argument("--baseline", metavar="FILE")
+    parser.add_argument("--tolerance", type=float, default=20)
+    args = parser.parse_args()
+
+    totals = {}
+    for target in args.targets:
+        # imports are noisy, use the fastest run
+        totals[target], packages = min(
+            (measure(target) for _ in range(args.runs)), key=lambda r: r[0]
+        )
+
+        print(f"{target}: {totals[target]:.1f} ms")
+        for name, ms in sorted(packages.items(), key=lambda i: -i[1])[: args.top]:
+            print(f"  {ms:8.1f} ms  {name}")
+        print()
+
+    if args.save:
+        with open(args.save, "w") as f:
+            dump(totals, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = load(f)
+        regressed = False
+        for target, total in totals.items():
+            if target not in baseline:
+                continue
+            change = (total / baseline[target] - 1) * 100
+            print(
+                f"{target}: {baseline[target]:.1f} ms -> {total:.1f} ms ({change:+.0f}%)"
+            )
+            if change > args.tolerance:
+                regressed = True
+        if regressed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
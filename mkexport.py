@@ -5,14 +5,22 @@ import requests
 export_dir = "infobeamer-cms-export"
 
 os.makedirs(export_dir)
-r = requests.get("http://localhost:8000/content/live?all=1")
-for idx, asset in enumerate(r.json()["assets"]):
+assets = []
+params = {"all": 1, "limit": 100}
+while True:
+    r = requests.get("http://localhost:8000/content/live", params=params).json()
+    assets.extend(r["assets"])
+    if not r["next"]:
+        break
+    params.update(seed=r["seed"], cursor=r["next"])
+
+for idx, asset in enumerate(assets):
     r = requests.get("http://localhost:8000" + asset["url"], stream=True)
     with open(
         "{}/asset-{:04d}-{}.{}".format(
             export_dir,
             idx,
-            asset["user"],
+            asset["username"],
             {"image": "jpg", "video": "mp4"}[asset["filetype"]],
         ),
         "wb",
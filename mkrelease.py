@@ -0,0 +1,17 @@
+# Run this at deploy time, before (re)starting the frontend. It writes
+# the release identifier and the deploy time to the RELEASE file, which
+# all workers read on startup. Workers only announce their release if
+# no later deploy has been announced already.
+from subprocess import check_output
+from time import time
+
+from util.release import BASE_DIR, RELEASE_FILES
+
+release = (
+    check_output(["git", "rev-parse", "--short=8", "HEAD"], cwd=BASE_DIR)
+    .decode()
+    .strip()
+)
+with open(f"{BASE_DIR}/{RELEASE_FILES[0]}", "w") as f:
+    f.write(f"{release} {int(time())}\n")
+print(release)
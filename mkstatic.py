@@ -0,0 +1,99 @@
+# Run this at deploy time, before (re)starting the frontend. It writes
+# minified bundles with a content hash in their name into static/dist,
+# together with gzip and brotli compressed copies and a manifest. The
+# frontend uses the manifest to link to those files, which nginx can
+# then serve with a year-long cache lifetime.
+import gzip
+import os
+import sys
+from hashlib import sha256
+from json import dump
+from time import time
+
+from util.static import BUNDLES, DIST_DIR, FINGERPRINTED, MANIFEST_FILE, STATIC_PATH
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from rjsmin import jsmin
+except ImportError:
+    jsmin = None
+
+try:
+    from rcssmin import cssmin
+except ImportError:
+    cssmin = None
+
+missing = [
+    name
+    for name, module in (("brotli", brotli), ("rjsmin", jsmin), ("rcssmin", cssmin))
+    if module is None
+]
+if missing:
+    print(
+        f"WARNING: {', '.join(missing)} not installed, the bundles won't be fully "
+        "minified and compressed. Install requirements.txt.",
+        file=sys.stderr,
+    )
+
+# old files are kept for a while, so clients which still have an old
+# page loaded can fetch them
+KEEP_OLD_FILES = 7 * 86400
+
+
+def read(filename):
+    with open(os.path.join(STATIC_PATH, filename), "rb") as f:
+        return f.read()
+
+
+def minify(filename, data):
+    if filename.endswith(".js") and jsmin is not None:
+        return jsmin(data.decode()).encode()
+    if filename.endswith(".css") and cssmin is not None:
+        return cssmin(data.decode()).encode()
+    return data
+
+
+def write(name, data):
+    base, ext = os.path.splitext(name)
+    filename = f"{DIST_DIR}/{base}.{sha256(data).hexdigest()[:12]}{ext}"
+    target = os.path.join(STATIC_PATH, filename)
+    with open(target, "wb") as f:
+        f.write(data)
+    if ext in (".css", ".js"):
+        with open(f"{target}.gz", "wb") as f:
+            f.write(gzip.compress(data, compresslevel=9))
+        if brotli is not None:
+            with open(f"{target}.br", "wb") as f:
+                f.write(brotli.compress(data))
+    print(f"{name} -> {filename}")
+    return filename
+
+
+os.makedirs(os.path.join(STATIC_PATH, DIST_DIR), exist_ok=True)
+
+manifest = {}
+for name, parts in BUNDLES.items():
+    separator = b";\n" if name.endswith(".js") else b"\n"
+    manifest[name] = write(
+        name, separator.join(minify(part, read(part)) for part in parts)
+    )
+for name in FINGERPRINTED:
+    manifest[name] = write(name, minify(name, read(name)))
+
+tmp_file = f"{MANIFEST_FILE}.tmp"
+with open(tmp_file, "w") as f:
+    dump(manifest, f, indent=2, sort_keys=True)
+os.replace(tmp_file, MANIFEST_FILE)
+
+current = {os.path.basename(filename) for filename in manifest.values()}
+current.add("manifest.json")
+for filename in os.listdir(os.path.join(STATIC_PATH, DIST_DIR)):
+    if filename.removesuffix(".gz").removesuffix(".br") in current:
+        continue
+    full_path = os.path.join(STATIC_PATH, DIST_DIR, filename)
+    if os.stat(full_path).st_mtime < time() - KEEP_OLD_FILES:
+        os.remove(full_path)
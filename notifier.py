@@ -1,8 +1,6 @@
 from json import dumps
 from logging import getLogger
 
-import paho.mqtt.client as mqtt
-from flask import url_for
 from requests import post
 
 from conf import CONFIG
@@ -18,6 +16,9 @@ class Notifier:
 
         self.mqtt = None
         if self.config.get("MQTT_HOST"):
+            # only load paho if we need it
+            import paho.mqtt.client as mqtt
+
             self.mqtt = mqtt.Client()
             if self.config.get("MQTT_USERNAME") and self.config.get("MQTT_PASSWORD"):
                 self.mqtt.username_pw_set(
@@ -79,6 +80,8 @@ class Notifier:
 
         headers = {}
         if asset is not None:
+            from flask import url_for
+
             headers["Click"] = url_for(
                 "content_moderate", asset_id=asset.id, _external=True
             )
@@ -111,6 +114,8 @@ class Notifier:
 
     @staticmethod
     def _mattermost_webhook(webhook_url, message, asset):
+        from flask import url_for
+
         LOG.info(f"sending message to {webhook_url} with message {message!r}")
 
         data = {
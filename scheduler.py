@@ -0,0 +1,88 @@
+import signal
+from datetime import datetime
+from json import loads
+from logging import getLogger
+from time import time
+
+from conf import CONFIG, maybe_reload_config, reload_config_safely
+from syncer import send_moderation_reminder, sync
+from util import get_live_schedule
+from util.events import CHANNEL, publish_event
+from util.ratelimit import RateLimited, with_backoff
+from util.redis import REDIS
+
+# Runs the syncer whenever the set of live content changes. Content
+# with starts/ends set gets synced exactly when it becomes live or
+# expires, moderation results get synced right away. Everything else
+# gets synced every SYNC_INTERVAL seconds, just like the periodic timer
+# would do.
+log = getLogger("Scheduler")
+
+
+def main():
+    signal.signal(signal.SIGHUP, reload_config_safely)
+    alert_minute = int(CONFIG["NOTIFIER"].get("ALERT_MINUTE", 7))
+    last_alert = None
+
+    # asset changes done by the frontend get announced through redis
+    pubsub = REDIS.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(CHANNEL)
+
+    next_sync = 0
+    while True:
+        maybe_reload_config()
+        now = time()
+        if now >= next_sync:
+            log.info("Starting sync")
+            try:
+                sync()
+                next_sync = time() + CONFIG.get("SYNC_INTERVAL", 300)
+            except RateLimited as e:
+                # try again as soon as there are tokens again
+                log.warning(f"sync was rate limited, retrying in {e.retry_after}s")
+                next_sync = time() + e.retry_after
+            except Exception:
+                log.exception("sync failed")
+                next_sync = time() + CONFIG.get("SYNC_INTERVAL", 300)
+
+        hour = datetime.now().replace(minute=0, second=0, microsecond=0)
+        if datetime.now().minute == alert_minute and last_alert != hour:
+            last_alert = hour
+            try:
+                with_backoff(send_moderation_reminder)
+            except Exception:
+                log.exception("sending moderation reminder failed")
+
+        now = time()
+        try:
+            transition = get_live_schedule().next_transition(int(now))
+        except Exception:
+            # we'll try again on the next round, at most a minute from now
+            log.exception("could not get the live schedule")
+            transition = None
+        wake_up = min(next_sync, now + 60)
+        if transition is not None and transition <= wake_up:
+            wake_up = transition
+            log.info(f"next content transition at {datetime.fromtimestamp(transition)}")
+
+        while now < wake_up:
+            message = pubsub.get_message(timeout=wake_up - now)
+            now = time()
+            if message is None:
+                continue
+            event = loads(message["data"])
+            if event["event"] == "content" and "asset_id" in event["data"]:
+                log.info(f"asset {event['data']['asset_id']} has changed")
+                # wait a few seconds, in case more changes are coming
+                next_sync = min(next_sync, now + 5)
+                break
+
+        if transition is not None and transition <= now:
+            log.info("live content has changed")
+            # let the browser slideshows know, too
+            publish_event("content")
+            next_sync = 0
+
+
+if __name__ == "__main__":
+    main()
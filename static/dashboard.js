@@ -79,11 +79,15 @@ const store = new Vuex.Store({
     },
     async review_asset({commit, dispatch}, {asset_id}) {
       await Vue.http.post(`/content/review/${asset_id}`)
-      await dispatch("update_content")
+      if (!events_connected()) {
+        await dispatch("update_content")
+      }
     },
     async remove_asset({commit, dispatch}, {asset_id}) {
       await Vue.http.delete(`/content/${asset_id}`)
-      await dispatch("update_content")
+      if (!events_connected()) {
+        await dispatch("update_content")
+      }
     },
     async update_asset({commit}, {asset_id, options}) {
       await Vue.http.post(`/content/${asset_id}`, options)
@@ -350,5 +354,22 @@ Vue.http.interceptors.push(request => {
   }
 })
 
+// refresh our list if one of our assets got changed, either by
+// ourselves or somewhere else, for example by a moderator
+let events = null
+if (window.EventSource) {
+  events = new EventSource('/api/events')
+  events.addEventListener('asset', e => {
+    const data = JSON.parse(e.data)
+    if (store.state.assets.some(asset => asset.id == data.asset_id)) {
+      store.dispatch('update_content')
+    }
+  })
+}
+
+function events_connected() {
+  return events !== null && events.readyState === EventSource.OPEN
+}
+
 store.dispatch('update_content')
 new Vue({el: "#main", store, router, })
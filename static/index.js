@@ -85,8 +85,18 @@ Vue.component('list-active', {
     assets: [],
   }),
   async created() {
-    const r = await Vue.http.get('content/live')
-    this.assets = r.data
+    // load the list page by page, so the first assets show up quickly
+    // even if there are lots of them. The seed keeps the random order
+    // stable while paging.
+    let params = {limit: 24}
+    while (true) {
+      const r = await Vue.http.get('content/live', {params: params})
+      this.assets.push(...r.data.assets)
+      if (!r.data.next) {
+        break
+      }
+      params = {limit: 24, seed: r.data.seed, cursor: r.data.next}
+    }
   }
 })
 
@@ -9,15 +9,22 @@ Vue.component('interrupt', {
         <p v-for='room in rooms'>
           <button @click='selected_room=room.name' class='btn btn-lg btn-block'>
             {{room.name}}
+            <span v-if='device_status(room) == false' class='label label-danger'>offline</span>
           </button>
         </p>
+        <h2 class='text-centered'>All rooms</h2>
+        <button @click='interrupt(all_device_ids, i.data)' class='btn btn-primary btn-lg btn-block'
+          v-for='i in all_interrupts'
+        >
+          Show '{{i.name}}' everywhere
+        </button>
       </template>
       <template v-else>
         <h2 class='text-centered'>{{selected_room}}</h2>
         <button @click='selected_room=null' class='btn btn-lg btn-block'>
           &lt; Back to room list..
         </button>
-        <button @click='interrupt(room_info.device_id, i.data)' class='btn btn-primary btn-lg btn-block'
+        <button @click='interrupt([room_info.device_id], i.data)' class='btn btn-primary btn-lg btn-block'
           v-for='i in room_info.interrupts'
         >
           Show '{{i.name}}'
@@ -28,8 +35,13 @@ Vue.component('interrupt', {
   data: () => ({
     selected_room: null,
     rooms: window.config.ROOMS,
-    api_key: window.config.API_KEY,
+    auth: window.config.AUTH,
+    devices: {},
   }),
+  created() {
+    this.update_devices()
+    setInterval(this.update_devices, 30000)
+  },
   computed: {
     room_info() {
       for (const room of this.rooms) {
@@ -37,13 +49,47 @@ Vue.component('interrupt', {
           return room
       }
     },
+    all_device_ids() {
+      return this.rooms.map(room => room.device_id)
+    },
+    all_interrupts() {
+      const seen = {}
+      for (const room of this.rooms) {
+        for (const i of room.interrupts || []) {
+          seen[i.data] = seen[i.data] || i
+        }
+      }
+      return Object.values(seen)
+    },
   },
   methods: {
-    interrupt(device_id, data) {
-      Vue.http.post(`https://info-beamer.com/api/v1/device/${device_id}/node/root/remote/trigger`, {
-        'api-key': this.api_key,
+    async update_devices() {
+      const r = await Vue.http.get('/api/devices', {params: {auth: this.auth}})
+      const devices = {}
+      for (const device of r.data.devices) {
+        devices[device.id] = device
+      }
+      this.devices = devices
+    },
+    device_status(room) {
+      // undefined if the poller hasn't seen the device (yet)
+      const device = this.devices[room.device_id]
+      return device && device.online
+    },
+    async interrupt(device_ids, data) {
+      // the server sends the interrupt to all devices at once
+      const r = await Vue.http.post('/api/interrupt', {
+        'auth': this.auth,
         'data': data,
+        'device_id': device_ids.join(','),
       })
+      for (const result of r.data.results) {
+        if (result.ok) {
+          notyf.success(`${result.room}: sent (${result.ms}ms)`)
+        } else {
+          notyf.error(`${result.room}: failed`)
+        }
+      }
     },
   },
 })
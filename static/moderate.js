@@ -13,6 +13,13 @@ Vue.component('moderate', {
       </div>
       <img class='img-responsive' :src='asset.url' v-else/>
       <hr/>
+      <div class='alert alert-warning' v-if='asset.duplicate_of.length > 0'>
+        This looks like a duplicate of
+        <span v-for='(duplicate, idx) in asset.duplicate_of'>
+          <span v-if='idx > 0'>, </span>
+          <a :href='"/content/moderate/" + duplicate.id'>asset {{duplicate.id}}</a>
+          ({{duplicate.state}})</span>.
+      </div>
       <template v-if='needs_moderation'>
         <p class='text-centered'>
           Current state: <strong>{{asset.state}}</strong><br>
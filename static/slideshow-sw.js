@@ -0,0 +1,139 @@
+// Service worker for the slideshow. It caches the mirrored assets, so
+// the slideshow keeps running from the local cache if the network goes
+// away, and doesn't need to download everything again after a reload.
+
+const CACHE_NAME = 'slideshow-assets';
+const ASSET_URL = /\/asset-[^\/]+$/;
+const MAX_BYTES = (parseInt(new URL(self.location).searchParams.get('cache_mb')) || 500) * 1024 * 1024;
+
+self.addEventListener('install', function(event) {
+    self.skipWaiting();
+});
+
+self.addEventListener('activate', function(event) {
+    event.waitUntil(self.clients.claim());
+});
+
+self.addEventListener('fetch', function(event) {
+    const url = new URL(event.request.url);
+    if (event.request.method != 'GET' || url.origin != self.location.origin || !ASSET_URL.test(url.pathname)) {
+        return;
+    }
+    event.respondWith(cached_fetch(event.request, url.pathname));
+});
+
+self.addEventListener('message', function(event) {
+    if (event.data['prune']) {
+        event.waitUntil(prune(event.data['prune']));
+    }
+});
+
+// Downloads which are still running, by path. The slideshow preloads
+// assets while the video element may already be requesting ranges of
+// the same file, those requests all wait for the one download.
+const in_flight = new Map();
+
+async function cached_fetch(request, path) {
+    const cache = await caches.open(CACHE_NAME);
+    let response = await cache.match(path);
+    if (response === undefined) {
+        let download = in_flight.get(path);
+        if (download === undefined) {
+            download = download_to_cache(cache, path).finally(function() {
+                in_flight.delete(path);
+            });
+            in_flight.set(path, download);
+        }
+        // every request gets its own copy of the body
+        response = (await download).clone();
+        if (!response.ok) {
+            return response;
+        }
+    }
+    return respond_with_range(request, response);
+}
+
+// Always fetches the whole file, even if the browser only asked for a
+// range of it.
+async function download_to_cache(cache, path) {
+    const upstream = await fetch(path);
+    if (!upstream.ok) {
+        return upstream;
+    }
+    const blob = await upstream.blob();
+    const response = new Response(blob, {
+        headers: {
+            'Content-Type': upstream.headers.get('Content-Type'),
+            'Content-Length': blob.size,
+        },
+    });
+    await cache.put(path, response.clone());
+    await enforce_size_limit(cache);
+    return response;
+}
+
+// Video elements request ranges of the file, which we need to answer
+// from the complete file we have in the cache.
+async function respond_with_range(request, response) {
+    const range = /^bytes=(\d*)-(\d*)$/.exec(request.headers.get('Range') || '');
+    if (range === null || (!range[1] && !range[2])) {
+        return response;
+    }
+    const content_type = response.headers.get('Content-Type');
+    const blob = await response.blob();
+    let start, end;
+    if (range[1]) {
+        start = parseInt(range[1]);
+        end = range[2] ? Math.min(parseInt(range[2]), blob.size - 1) : blob.size - 1;
+    } else {
+        // "bytes=-500" asks for the last 500 bytes
+        start = Math.max(0, blob.size - parseInt(range[2]));
+        end = blob.size - 1;
+    }
+    if (start > end) {
+        return new Response(null, {
+            status: 416,
+            headers: {'Content-Range': 'bytes */' + blob.size},
+        });
+    }
+    return new Response(blob.slice(start, end + 1), {
+        status: 206,
+        headers: {
+            'Content-Type': content_type,
+            'Content-Length': end - start + 1,
+            'Content-Range': 'bytes ' + start + '-' + end + '/' + blob.size,
+        },
+    });
+}
+
+// Drop the oldest entries until the cache fits into the size limit.
+// Cache keys are returned in insertion order.
+async function enforce_size_limit(cache) {
+    const keys = await cache.keys();
+    const sizes = [];
+    let total = 0;
+    for (const key of keys) {
+        const response = await cache.match(key);
+        const size = parseInt(response.headers.get('Content-Length')) || 0;
+        sizes.push(size);
+        total += size;
+    }
+    for (let i = 0; i < keys.length - 1 && total > MAX_BYTES; i++) {
+        console.info('slideshow-sw: evicting ' + keys[i].url);
+        await cache.delete(keys[i]);
+        total -= sizes[i];
+    }
+}
+
+async function prune(live_urls) {
+    const live = new Set(live_urls.map(function(url) {
+        return new URL(url, self.location).pathname;
+    }));
+    const cache = await caches.open(CACHE_NAME);
+    for (const key of await cache.keys()) {
+        if (!live.has(new URL(key.url).pathname)) {
+            console.info('slideshow-sw: dropping ' + key.url);
+            await cache.delete(key);
+        }
+    }
+}
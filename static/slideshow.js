@@ -1,5 +1,30 @@
 document.getElementById("slideshow").style.display = "none";
 
+// The service worker keeps a copy of all mirrored assets, so we can
+// keep running through network problems and don't need to download
+// everything again after a reload.
+if ('serviceWorker' in navigator) {
+    navigator.serviceWorker.register(
+        '/slideshow-sw.js?cache_mb=' + slideshow_config.cache_mb,
+        {scope: '/slideshow'}
+    ).catch(function(e) {
+        console.warn("could not register service worker: " + e);
+    });
+}
+
+// tell the service worker which assets are still live, so it can
+// drop everything else from its cache
+function prune_cache() {
+    if (!('serviceWorker' in navigator) || !navigator.serviceWorker.controller) {
+        return;
+    }
+    navigator.serviceWorker.controller.postMessage({
+        'prune': Object.values(content).map(function(asset) {
+            return asset['url'];
+        }),
+    });
+}
+
 // the timer that's running the slideshow. Gets started automatically by
 // get_live_assets() if it's null
 slideshow_timer = null;
@@ -38,28 +63,94 @@ function shuffle_content() {
     content_shuffled = array;
 }
 
-// Auto-reload slideshow in case the backend has restarted. We need this
-// to ensure we're running the latest code, without needing to press
-// reload on every display individually.
-window.setInterval(function() {
-    console.info('checking if slideshow needs reloading because server has restarted');
+// Subscribe to server-sent events, so we learn about content changes
+// and deploys right away. Polling below stays active as a fallback, but
+// gets skipped most of the time while the event stream is connected.
+events = null;
+refetch_pending = false;
+if (window.EventSource) {
+    events = new EventSource('/api/events');
+    events.addEventListener('content', function(e) {
+        data = JSON.parse(e.data);
+        if (data['version'] !== undefined && data['version'] == content_version && data['epoch'] == content_epoch) {
+            return;
+        }
+        // a change usually gets announced twice, once when it happens
+        // and once more with the new version. One fetch is enough.
+        if (refetch_pending) {
+            return;
+        }
+        refetch_pending = true;
+        // all displays get this event at the same time, don't let them
+        // all ask for the new content in the same moment
+        window.setTimeout(function() {
+            refetch_pending = false;
+            get_live_assets();
+        }, Math.random() * 5000);
+    });
+    events.addEventListener('reload', function() {
+        check_startup();
+    });
+}
+
+// returns true if we should poll even though events are connected
+function should_poll(last_poll) {
+    if (events === null || events.readyState !== EventSource.OPEN) {
+        return true;
+    }
+    return Date.now() - last_poll > 300000;
+}
+
+// Auto-reload slideshow in case a new release got deployed. We need
+// this to ensure we're running the latest code, without needing to
+// press reload on every display individually.
+last_startup_check = 0;
+function check_startup() {
+    console.info('checking if slideshow needs reloading because of a new release');
+    last_startup_check = Date.now();
     xhr_get('/api/startup', function() {
-        startup = parseInt(req.responseText);
-        if (startup > 0 && app_startup < startup) {
-            console.warn('startup time has changed, reloading GUI');
+        release = req.responseText.trim();
+        if (release.length > 0 && release != app_release) {
+            console.warn('release has changed from ' + app_release + ' to ' + release + ', reloading GUI');
             window.location.reload();
         } else {
             console.info('slideshow does not need reloading');
         }
     });
+}
+
+window.setInterval(function() {
+    if (should_poll(last_startup_check)) {
+        check_startup();
+    }
 }, 42000);
 
-// Load the list of live assets.
+// Load the list of live assets. We only ask for the changes since the
+// version we already know about. The server sends us the full list if
+// our version is too old, or from another epoch (the server lost its
+// version counter and started over).
+last_content_poll = 0;
+content_version = 0;
+content_epoch = '';
 function get_live_assets() {
-    console.info('loading live assets');
-    xhr_get('/api/slideshow/content', function() {
-        content = JSON.parse(req.responseText);
-        console.info("got live assets, " + Object.keys(content).length + " assets in total");
+    console.info('loading live assets since version ' + content_version);
+    last_content_poll = Date.now();
+    xhr_get('/api/slideshow/content?since=' + content_version + '&epoch=' + content_epoch, function() {
+        delta = JSON.parse(req.responseText);
+        if (delta['full']) {
+            content = delta['content'];
+        } else {
+            for (const [asset_id, asset] of Object.entries(delta['added'])) {
+                content[asset_id] = asset;
+            }
+            for (const asset_id of delta['removed']) {
+                delete content[asset_id];
+            }
+        }
+        content_version = delta['version'];
+        content_epoch = delta['epoch'];
+        prune_cache();
+        console.info("got live assets version " + content_version + ", " + Object.keys(content).length + " assets in total");
         if (slideshow_timer === null && Object.keys(content).length > 0) {
             slideshow_tick();
             slideshow_timer = window.setInterval(slideshow_tick, 10000);
@@ -68,7 +159,11 @@ function get_live_assets() {
 }
 
 get_live_assets();
-window.setInterval(get_live_assets, 30000);
+window.setInterval(function() {
+    if (should_poll(last_content_poll)) {
+        get_live_assets();
+    }
+}, 30000);
 
 // The actual magic starts here. This function knows about the current
 // position in the slideshow and automatically selects the next available
@@ -98,12 +193,48 @@ function get_next_asset_to_show() {
     return content[next_asset];
 }
 
+// Keep the next few assets loaded in the background, so they are ready
+// once it's their turn. Elements for assets which are no longer coming
+// up get dropped again.
+preloaded = {};
+function preload_upcoming() {
+    const position = content_shuffled.indexOf(currently_showing);
+    const upcoming = {};
+    for (let i = 1; i <= slideshow_config.preload && i < content_shuffled.length; i++) {
+        const asset = content[content_shuffled[(position + i) % content_shuffled.length]];
+        if (asset === undefined) {
+            continue;
+        }
+        upcoming[asset['url']] = true;
+        if (preloaded[asset['url']] !== undefined) {
+            continue;
+        }
+        console.debug("preloading " + asset['url']);
+        if (asset['type'] == 'image') {
+            el = new Image();
+        } else {
+            el = document.createElement("video");
+            el.preload = "auto";
+            el.muted = true;
+        }
+        el.src = asset['url'];
+        preloaded[asset['url']] = el;
+    }
+    for (const url of Object.keys(preloaded)) {
+        if (!upcoming[url]) {
+            preloaded[url].removeAttribute("src");
+            delete preloaded[url];
+        }
+    }
+}
+
 function slideshow_tick() {
     document.getElementById("slideshow").style.display = "block";
     document.getElementById("error").style.display = "none";
 
     next_asset = get_next_asset_to_show();
     console.info("next asset is " + next_asset['url'] + " of type " + next_asset['type']);
+    preload_upcoming();
 
     image = document.getElementById("slideshow-image");
     video = document.getElementById("slideshow-video");
@@ -111,6 +242,7 @@ function slideshow_tick() {
     if (next_asset['type'] == 'image') {
         img = document.createElement("img");
         img.onload = function() {
+            video.oncanplay = null;
             video.pause();
             video.currentTime = 0;
             video.style.display = "none";
@@ -120,11 +252,16 @@ function slideshow_tick() {
         }
         img.src = next_asset['url'];
     } else  if (next_asset['type'] == 'video') {
-        image.style.display = "none";
-
+        // keep showing the previous image until the video is able to
+        // play, instead of showing a black frame while it loads
+        video.oncanplay = function() {
+            video.oncanplay = null;
+            image.style.display = "none";
+            video.style.display = "block";
+            video.play();
+        }
         video.src = next_asset["url"];
-        video.style.display = "block";
-        video.play();
+        video.load();
     } else {
         document.getElementById("slideshow").style.display = "none";
         document.getElementById("error").style.display = "block";
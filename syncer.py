@@ -1,22 +1,26 @@
+from argparse import ArgumentParser
 from datetime import datetime
 from json import dumps as json_dumps
 from logging import getLogger
+from time import time
 
-from conf import CONFIG
+from conf import CONFIG, is_admin_user
 from ib_hosted import ib
 from notifier import Notifier
-from util import Asset, State, get_all_live_assets, get_assets
+from util import Asset, State, get_all_live_assets, get_assets, unique_assets
+from util.playlist import compile_playlist
+from util.profiler import CLOCKS, Profiler
+from util.ratelimit import with_backoff
 from util.redis import REDIS
+from util.transitions import get_transitions, observe, oldest_age, record_transition
 
-FADE_TIME = CONFIG.get("FADE_TIME", 0.5)
 SLIDE_TIME = 10
 log = getLogger("Syncer")
 
-log.info("Starting sync")
-
 
 def asset_to_tiles(asset: Asset):
     log.debug("adding {} to Page".format(asset.id))
+    fade_time = CONFIG.get("FADE_TIME", 0.5)
 
     tiles = []
     if asset.filetype == "video":
@@ -29,7 +33,7 @@ def asset_to_tiles(asset: Asset):
                 "x2": 1920,
                 "y2": 1080,
                 "config": {
-                    "fade_time": FADE_TIME,
+                    "fade_time": fade_time,
                     "layer": -5,
                     "looped": True,
                 },
@@ -44,7 +48,7 @@ def asset_to_tiles(asset: Asset):
                 "y1": 0,
                 "x2": 1920,
                 "y2": 1080,
-                "config": {"fade_time": FADE_TIME},
+                "config": {"fade_time": fade_time},
             }
         )
 
@@ -55,7 +59,7 @@ def asset_to_tiles(asset: Asset):
         user_is_admin = user_is_admin.decode()
 
     if user_is_admin != "1":
-        user_is_admin = asset.userid in CONFIG["ADMIN_USERS"]
+        user_is_admin = is_admin_user(asset.userid)
 
     if user_is_admin not in ("1", True):
         tiles.append(
@@ -66,7 +70,7 @@ def asset_to_tiles(asset: Asset):
                 "y1": 1040,
                 "x2": 1920,
                 "y2": 1080,
-                "config": {"color": "#000000", "alpha": 230, "fade_time": FADE_TIME},
+                "config": {"color": "#000000", "alpha": 230, "fade_time": fade_time},
             }
         )
         tiles.append(
@@ -79,7 +83,7 @@ def asset_to_tiles(asset: Asset):
                 "y2": 1080,
                 "config": {
                     "font_size": 25,
-                    "fade_time": FADE_TIME,
+                    "fade_time": fade_time,
                     "text": "{type} by {user} - visit {url} to share your own.".format(
                         type=asset.filetype.capitalize(),
                         user=asset.username,
@@ -94,10 +98,11 @@ def asset_to_tiles(asset: Asset):
     return tiles
 
 
-if datetime.now().minute == int(CONFIG["NOTIFIER"].get("ALERT_MINUTE", 7)):
+def send_moderation_reminder():
     n = Notifier()
     asset_states = {}
-    for asset in get_assets():
+    assets = get_assets()
+    for asset in assets:
         if asset.state not in (State.CONFIRMED, State.REJECTED, State.DELETED):
             if asset.state not in asset_states:
                 asset_states[asset.state] = 0
@@ -110,67 +115,127 @@ if datetime.now().minute == int(CONFIG["NOTIFIER"].get("ALERT_MINUTE", 7)):
     for state, count in sorted(asset_states.items()):
         msg.append(f"{count} assets in state {state}.")
 
+    oldest = oldest_age(
+        [asset.id for asset in assets if asset.state == State.REVIEW],
+        State.REVIEW,
+    )
+    if oldest is not None:
+        msg.append(f"Oldest review request is {int(oldest // 60)} minutes old.")
+
     if msg:
         n.message(" ".join(msg), level="WARN")
 
 
-pages = []
-assets_visible = set()
-for asset in get_all_live_assets():
-    pages.append(
-        {
-            "auto_duration": SLIDE_TIME,
-            "duration": SLIDE_TIME
-            - (
-                FADE_TIME * 2
-            ),  # Because it seems like the fade time is exclusive of the 10 sec, so videos play for 11 secs.
-            "interaction": {"key": ""},
-            "layout_id": -1,  # Use first layout
-            "overlap": 0,
-            "tiles": asset_to_tiles(asset),
-        }
-    )
-    assets_visible.add(asset.id)
+def record_sync_delays(assets):
+    """Observe how long it took for confirmed assets to show up on the
+    setups for the first time since they were confirmed, or since they
+    started being live, whichever was later."""
+    now = time()
+    transitions = get_transitions([asset.id for asset in assets])
+    for asset in assets:
+        t = transitions[asset.id]
+        if "confirmed" not in t or t.get("synced", 0) >= t["confirmed"]:
+            continue
+        record_transition(asset.id, "synced", now)
+        observe(
+            "moderation_sync_delay_seconds",
+            max(0, now - max(t["confirmed"], asset.starts or 0)),
+        )
+
 
-log.info(
-    "There are currently {} pages visible with asset ids: {}".format(
-        len(pages), ", ".join([str(i) for i in sorted(assets_visible)])
+def sync():
+    pages = []
+    assets_visible = set()
+    # assets with the same content only get one page
+    live_assets = compile_playlist(unique_assets(get_all_live_assets()))
+    for asset in live_assets:
+        pages.append(
+            {
+                "auto_duration": SLIDE_TIME,
+                "duration": SLIDE_TIME
+                - (
+                    CONFIG.get("FADE_TIME", 0.5) * 2
+                ),  # Because it seems like the fade time is exclusive of the 10 sec, so videos play for 11 secs.
+                "interaction": {"key": ""},
+                "layout_id": -1,  # Use first layout
+                "overlap": 0,
+                "tiles": asset_to_tiles(asset),
+            }
+        )
+        assets_visible.add(asset.id)
+
+    log.info(
+        "There are currently {} pages visible with asset ids: {}".format(
+            len(pages), ", ".join([str(i) for i in sorted(assets_visible)])
+        )
     )
-)
-
-for setup_id in CONFIG["SETUP_IDS"]:
-    slog = getLogger(f"Setup {setup_id}")
-    slog.info("Getting old config")
-    config = ib.get(f"setup/{setup_id}")["config"][""]
-    setup_changed = False
-
-    for schedule in config["schedules"]:
-        if schedule["name"] == "User Content":
-            slog.info('Found schedule "User Content"')
-            assets_shown = set()
-
-            for page in schedule["pages"]:
-                for tile in page["tiles"]:
-                    if tile["type"] in ("image", "rawvideo"):
-                        assets_shown.add(tile["asset"])
-
-            slog.info(
-                "schedule shows assets: {}".format(
-                    ", ".join([str(i) for i in sorted(assets_shown)])
+
+    for setup_id in CONFIG["SETUP_IDS"]:
+        slog = getLogger(f"Setup {setup_id}")
+        slog.info("Getting old config")
+        config = ib.get(f"setup/{setup_id}")["config"][""]
+        setup_changed = False
+
+        for schedule in config["schedules"]:
+            if schedule["name"] == "User Content":
+                slog.info('Found schedule "User Content"')
+                assets_shown = set()
+
+                for page in schedule["pages"]:
+                    for tile in page["tiles"]:
+                        if tile["type"] in ("image", "rawvideo"):
+                            assets_shown.add(tile["asset"])
+
+                slog.info(
+                    "schedule shows assets: {}".format(
+                        ", ".join([str(i) for i in sorted(assets_shown)])
+                    )
                 )
+                if assets_visible != assets_shown:
+                    schedule["pages"] = pages
+                    setup_changed = True
+
+        if setup_changed:
+            slog.warning("Config has changed, updating")
+            ib.post(
+                f"setup/{setup_id}",
+                config=json_dumps({"": config}, separators=(",", ":")),
+                mode="update",
             )
-            if assets_visible != assets_shown:
-                schedule["pages"] = pages
-                setup_changed = True
-
-    if setup_changed:
-        slog.warning("Config has changed, updating")
-        ib.post(
-            f"setup/{setup_id}",
-            config=json_dumps({"": config}),
-            mode="update",
-        )
-    else:
-        slog.info("Config has not changed, skipping update")
+        else:
+            slog.info("Config has not changed, skipping update")
+
+    record_sync_delays(live_assets)
+
 
-log.info("updated everything")
+def main():
+    log.info("Starting sync")
+    if datetime.now().minute == int(CONFIG["NOTIFIER"].get("ALERT_MINUTE", 7)):
+        with_backoff(send_moderation_reminder)
+    with_backoff(sync)
+    log.info("updated everything")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument(
+        "--profile",
+        metavar="FILE",
+        help="profile the sync and write collapsed stacks (for flamegraphs) to FILE",
+    )
+    parser.add_argument(
+        "--profile-clock",
+        choices=CLOCKS,
+        default="wall",
+        help='"wall" includes time spent waiting for info-beamer, "cpu" does not',
+    )
+    args = parser.parse_args()
+
+    if args.profile:
+        with Profiler(clock=args.profile_clock) as profiler:
+            main()
+        with open(args.profile, "w") as f:
+            f.write(profiler.collapsed())
+        log.info(f"wrote profile to {args.profile}")
+    else:
+        main()
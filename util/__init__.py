@@ -1,47 +1,14 @@
 import enum
-import os
 import random
-import shutil
-import tempfile
 from datetime import datetime, timezone
-from functools import wraps
+from hashlib import blake2b
 from typing import NamedTuple, Optional
 
-import requests
-from flask import abort, current_app, g, jsonify, redirect, request, session, url_for
-
 from conf import CONFIG
-from util.sso import DEFAULT_ADMIN_SSO_PROVIDER, DEFAULT_SSO_PROVIDER
-
-from .ib_hosted import ib
-
-
-def error(msg):
-    return jsonify(error=msg), 400
-
-
-def login_required(f):
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        if not g.userid:
-            session["redirect_after_login"] = request.url
-            return redirect(url_for("login", provider=DEFAULT_SSO_PROVIDER))
-        return f(*args, **kwargs)
-
-    return decorated_function
-
-
-def admin_required(f):
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        if not g.userid:
-            session["redirect_after_login"] = request.url
-            return redirect(url_for("login", provider=DEFAULT_ADMIN_SSO_PROVIDER))
-        if not g.user_is_admin:
-            abort(401)
-        return f(*args, **kwargs)
 
-    return decorated_function
+from .ib_hosted import AssetNotFound, ib
+from .mirror import MIRROR
+from .schedule import get_schedule
 
 
 class State(enum.StrEnum):
@@ -63,8 +30,13 @@ class Asset(NamedTuple):
     ends: Optional[int] = None
     moderate_url: Optional[str] = None
     moderated_by: Optional[str] = None
+    # found when the review was requested, see find_duplicates
+    duplicate_of: tuple = ()
 
     def to_dict(self, user_data=False, mod_data=False):
+        # only the frontend needs this, the syncer shouldn't have to load flask
+        from flask import url_for
+
         result = {
             "id": self.id,
             "userid": self.userid,
@@ -90,6 +62,7 @@ class Asset(NamedTuple):
                         "content_moderate", asset_id=self.id, _external=True
                     ),
                     "moderated_by": self.moderated_by,
+                    "duplicate_of": list(self.duplicate_of),
                 }
             )
 
@@ -117,11 +90,12 @@ def parse_asset(asset):
         starts=to_int(asset["userdata"].get("starts")),
         ends=to_int(asset["userdata"].get("ends")),
         moderated_by=asset["userdata"].get("moderated_by"),
+        duplicate_of=tuple(asset["userdata"].get("duplicate_of", ())),
     )
 
 
 def get_asset(asset_id):
-    return parse_asset(ib.get(f"asset/{asset_id}"))
+    return parse_asset(ib.get_asset(asset_id))
 
 
 def get_assets(cached=False):
@@ -133,24 +107,48 @@ def get_assets(cached=False):
     ]
 
 
-def get_user_assets():
-    return [
-        a for a in get_assets() if a.userid == g.userid and a.state != State.DELETED
-    ]
-
-
 def get_assets_awaiting_moderation():
     return [asset for asset in get_assets() if asset.state == State.REVIEW]
 
 
+def get_live_schedule():
+    # the version has to be read before the assets, so we never keep a
+    # schedule built from an older list than its version says
+    return get_schedule(
+        ib.version("asset/list"),
+        lambda: [
+            asset for asset in get_assets(cached=True) if asset.state == State.CONFIRMED
+        ],
+    )
+
+
 def get_all_live_assets(no_time_filter=False):
-    now = int(datetime.now().timestamp())
-    return [
-        asset
-        for asset in get_assets(cached=True)
-        if asset.state in (State.CONFIRMED,)
-        and (no_time_filter or ((asset.starts or now) <= now <= (asset.ends or now)))
-    ]
+    schedule = get_live_schedule()
+    if no_time_filter:
+        return list(schedule.assets)
+    # callers may shuffle the list, don't let them change the schedule's copy
+    return list(schedule.live_at(int(datetime.now().timestamp())))
+
+
+def shuffle_key(seed, asset_id):
+    return blake2b(
+        str(asset_id).encode(), key=seed.to_bytes(8, "big"), digest_size=8
+    ).hexdigest()
+
+
+def shuffled_page(assets, seed, cursor=None, limit=24):
+    # Order the assets by a keyed hash of their id instead of shuffling
+    # the list. This gives every seed a stable random order, which does
+    # not change if assets get added or removed while a client is paging
+    # through the list. The cursor is the sort key of the last asset on
+    # the previous page.
+    keyed = sorted(((shuffle_key(seed, a.id), a) for a in assets), key=lambda ka: ka[0])
+    if cursor:
+        keyed = [(k, a) for k, a in keyed if k > cursor]
+
+    page = keyed[:limit]
+    next_cursor = page[-1][0] if len(keyed) > limit else None
+    return [a for _, a in page], next_cursor
 
 
 def is_within_timeframe():
@@ -165,26 +163,57 @@ def get_random():
     return "".join("%02x" % random.getrandbits(8) for _ in range(64))
 
 
+def asset_filename(asset: Asset):
+    return "asset-{}.{}".format(
+        asset.id,
+        "jpg" if asset.filetype == "image" else "mp4",
+    )
+
+
 def cached_asset_name(asset: Asset):
     if asset.state == State.DELETED:
         return None
 
-    asset_id = asset.id
-    filename = "asset-{}.{}".format(
-        asset_id,
-        "jpg" if asset.filetype == "image" else "mp4",
-    )
-    cache_name = os.path.join(CONFIG.get("STATIC_PATH", "static"), filename)
-
-    if not os.path.exists(cache_name):
-        current_app.logger.info(f"fetching {asset_id} to {cache_name}")
-        dl = ib.get(f"asset/{asset_id}/download")
-        r = requests.get(dl["download_url"], stream=True, timeout=5)
-        r.raise_for_status()
-        with tempfile.NamedTemporaryFile(delete=False) as f:
-            shutil.copyfileobj(r.raw, f)
-            shutil.move(f.name, cache_name)
-            os.chmod(cache_name, 0o664)
-        del r
-
+    filename = asset_filename(asset)
+    MIRROR.ensure(asset.id, filename)
     return filename
+
+
+def find_duplicates(asset: Asset):
+    """Other assets with the same content which have already been
+    moderated. This may download the asset and fetch every duplicate,
+    so it only runs once, when the review is requested. The result is
+    kept in the asset's userdata."""
+    filename = cached_asset_name(asset)
+    if filename is None:
+        return []
+    content_hash = MIRROR.content_hash(asset.id, filename)
+    if content_hash is None:
+        return []
+
+    duplicates = []
+    for asset_id in MIRROR.assets_with_hash(content_hash):
+        if asset_id == asset.id:
+            continue
+        try:
+            duplicate = get_asset(asset_id)
+        except AssetNotFound:
+            continue
+        if duplicate.state in (State.CONFIRMED, State.REJECTED):
+            duplicates.append(duplicate)
+    # the first one is the original: confirmed ones win, then the oldest
+    return sorted(duplicates, key=lambda a: (a.state != State.CONFIRMED, a.id))
+
+
+def unique_assets(assets):
+    """Drop assets with the same content as one before them."""
+    seen = set()
+    result = []
+    for asset in assets:
+        content_hash = MIRROR.content_hash(asset.id, asset_filename(asset))
+        if content_hash is not None:
+            if content_hash in seen:
+                continue
+            seen.add(content_hash)
+        result.append(asset)
+    return result
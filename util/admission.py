@@ -0,0 +1,99 @@
+from logging import getLogger
+from threading import BoundedSemaphore
+
+from werkzeug.wsgi import ClosingIterator
+
+from conf import CONFIG, on_config_reload
+
+LOG = getLogger("Admission")
+
+# Requests are sorted into priority classes by path, the longest
+# matching prefix wins. Each class gets its own concurrency limit per
+# worker, so a burst of logins or uploads, which may wait on info-beamer
+# for seconds, can't starve the displays or the admins. Requests which
+# don't get a slot within QUEUE_TIMEOUT seconds are answered with a 503.
+DEFAULT_ROUTES = {
+    # venue screens and monitoring
+    "/api/slideshow/": "display",
+    "/api/startup": "display",
+    "/metrics": "display",
+    "/proof": "display",
+    "/slideshow": "display",
+    "/static/": "display",
+    # admins
+    "/api/interrupt": "admin",
+    "/api/stats": "admin",
+    "/content/awaiting_moderation": "admin",
+    "/content/moderate/": "admin",
+    "/interrupt": "admin",
+    # everything that might be slow and can be retried by the user
+    "/content/list": "low",
+    "/content/review/": "low",
+    "/content/upload": "low",
+    "/dashboard": "low",
+    "/login/": "low",
+    # long-lived event streams would block a slot forever
+    "/api/events": None,
+}
+# 0 means unlimited
+DEFAULT_LIMITS = {
+    "admin": 20,
+    "default": 100,
+    "display": 0,
+    "low": 20,
+}
+
+
+class AdmissionControl:
+    def __init__(self, app):
+        self.app = app
+        self.configure()
+        on_config_reload(self.configure)
+
+    def configure(self):
+        config = CONFIG.get("ADMISSION", {})
+        self.queue_timeout = config.get("QUEUE_TIMEOUT", 1)
+        self.retry_after = str(config.get("RETRY_AFTER", 5))
+
+        routes = DEFAULT_ROUTES | config.get("ROUTES", {})
+        self.routes = sorted(routes.items(), key=lambda i: len(i[0]), reverse=True)
+
+        # requests which are running right now keep the semaphore they
+        # got, so replacing them on reload is safe
+        limits = DEFAULT_LIMITS | config.get("LIMITS", {})
+        self.slots = {
+            cls: BoundedSemaphore(limit) if limit else None
+            for cls, limit in limits.items()
+        }
+
+    def classify(self, path):
+        for prefix, cls in self.routes:
+            if path.startswith(prefix):
+                return cls
+        return "default"
+
+    def __call__(self, environ, start_response):
+        cls = self.classify(environ.get("PATH_INFO", "/"))
+        slots = self.slots.get(cls)
+        if slots is None:
+            return self.app(environ, start_response)
+
+        if not slots.acquire(timeout=self.queue_timeout):
+            LOG.warning(f"no slot for {cls} request to {environ.get('PATH_INFO')}")
+            start_response(
+                "503 Service Unavailable",
+                [
+                    ("Content-Type", "text/plain"),
+                    ("Retry-After", self.retry_after),
+                    ("Cache-Control", "no-store"),
+                ],
+            )
+            return [b"overloaded, please try again later\n"]
+
+        try:
+            app_iter = self.app(environ, start_response)
+        except BaseException:
+            slots.release()
+            raise
+        # the slot gets freed once the response has been sent completely
+        return ClosingIterator(app_iter, [slots.release])
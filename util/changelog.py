@@ -0,0 +1,104 @@
+from json import dumps, loads
+from secrets import token_hex
+
+from conf import CONFIG
+
+from .events import publish_event
+from .redis import REDIS
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _get_version():
+    return int(REDIS.get("live:version") or 0)
+
+
+def get_epoch():
+    """Random id of the current version counter. If redis loses its
+    data, the counter starts over at 1, so versions clients remember
+    could mean something else now. They get a new epoch then, and with
+    it, a full snapshot."""
+    p = REDIS.pipeline(transaction=False)
+    p.set("live:epoch", token_hex(8), nx=True)
+    p.get("live:epoch")
+    return _decode(p.execute()[1])
+
+
+def _get_snapshot():
+    return {_decode(k): _decode(v) for k, v in REDIS.hgetall("live:snapshot").items()}
+
+
+def update_live_set(content):
+    """Compare the given id->data mapping of live content to the last
+    known state and record the difference as a new version. Returns the
+    current version."""
+    current = {str(k): dumps(v, sort_keys=True) for k, v in content.items()}
+
+    if _get_snapshot() == current:
+        return _get_version()
+
+    with REDIS.lock("lock:live", timeout=10, blocking_timeout=10):
+        # someone else might have recorded the change while we were
+        # waiting for the lock
+        snapshot = _get_snapshot()
+        added = {k: loads(v) for k, v in current.items() if snapshot.get(k) != v}
+        removed = [k for k in snapshot if k not in current]
+        if not added and not removed:
+            return _get_version()
+
+        version = REDIS.incr("live:version")
+        p = REDIS.pipeline()
+        p.delete("live:snapshot")
+        if current:
+            p.hset("live:snapshot", mapping=current)
+        p.zadd(
+            "live:changes",
+            {dumps({"added": added, "removed": removed, "version": version}): version},
+        )
+        # Clients which are further behind than LIVE_CHANGELOG_LENGTH
+        # changes get a full snapshot instead.
+        p.zremrangebyrank(
+            "live:changes", 0, -CONFIG.get("LIVE_CHANGELOG_LENGTH", 500) - 1
+        )
+        p.execute()
+
+    publish_event("content", version=version, epoch=get_epoch())
+    return version
+
+
+def get_live_delta(since, epoch):
+    """Returns the changes since the given version of the given epoch,
+    or None if the client needs to get a full snapshot instead."""
+    if epoch != get_epoch():
+        return None
+    version = _get_version()
+    if since == version:
+        return {"version": version, "epoch": epoch, "added": {}, "removed": []}
+    if since <= 0 or since > version:
+        return None
+
+    changes = [
+        loads(c) for c in REDIS.zrangebyscore("live:changes", f"({since}", version)
+    ]
+    if not changes or changes[0]["version"] != since + 1:
+        # we don't have all the changes anymore
+        return None
+
+    added = {}
+    removed = set()
+    for change in changes:
+        for k, v in change["added"].items():
+            added[k] = v
+            removed.discard(k)
+        for k in change["removed"]:
+            added.pop(k, None)
+            removed.add(k)
+
+    return {
+        "version": changes[-1]["version"],
+        "epoch": epoch,
+        "added": added,
+        "removed": sorted(removed),
+    }
@@ -0,0 +1,106 @@
+import re
+from logging import getLogger
+
+from conf import CONFIG
+
+from .redis import REDIS
+
+LOG = getLogger("Circuit")
+
+# One circuit breaker per info-beamer endpoint, shared by all workers
+# through redis. After CIRCUIT_FAILURES failed requests within
+# CIRCUIT_WINDOW seconds, the circuit opens and all requests to that
+# endpoint fail right away for CIRCUIT_OPEN_SECONDS. After that, a
+# single request gets through. If it succeeds, the circuit closes
+# again, otherwise it stays open for another round.
+CLOSED = 0
+OPEN = 1
+HALF_OPEN = 2
+
+
+class CircuitOpen(Exception):
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def endpoint_name(ep):
+    return re.sub(r"/\d+(?=/|$)", "/{id}", ep)
+
+
+def check_circuit(name):
+    """Raises CircuitOpen if requests to this endpoint should not be
+    sent right now. If redis fails, we let the request pass."""
+    try:
+        p = REDIS.pipeline(transaction=False)
+        p.ttl(f"circuit:{name}:open")
+        p.exists(f"circuit:{name}:tripped")
+        open_for, tripped = p.execute()
+        if open_for > 0:
+            raise CircuitOpen(f"circuit for {name} is open", open_for)
+        if tripped and not REDIS.set(f"circuit:{name}:probe", "1", nx=True, ex=30):
+            raise CircuitOpen(
+                f"circuit for {name} is half-open, waiting for probe",
+                CONFIG.get("CIRCUIT_OPEN_SECONDS", 30),
+            )
+    except CircuitOpen:
+        raise
+    except Exception as e:
+        LOG.warning(f"could not check circuit for {name}: {e!r}")
+
+
+def record_success(name):
+    try:
+        REDIS.delete(
+            f"circuit:{name}:failures",
+            f"circuit:{name}:tripped",
+            f"circuit:{name}:probe",
+        )
+    except Exception as e:
+        LOG.warning(f"could not record success for {name}: {e!r}")
+
+
+def record_failure(name):
+    try:
+        p = REDIS.pipeline(transaction=False)
+        p.incr(f"circuit:{name}:failures")
+        p.exists(f"circuit:{name}:tripped")
+        p.sadd("circuit:endpoints", name)
+        failures, tripped, _ = p.execute()
+        if failures == 1:
+            REDIS.expire(f"circuit:{name}:failures", CONFIG.get("CIRCUIT_WINDOW", 30))
+
+        if not tripped and failures < CONFIG.get("CIRCUIT_FAILURES", 5):
+            return
+
+        LOG.warning(f"opening circuit for {name} after {failures} failures")
+        p = REDIS.pipeline(transaction=False)
+        p.set(f"circuit:{name}:open", "1", ex=CONFIG.get("CIRCUIT_OPEN_SECONDS", 30))
+        p.set(f"circuit:{name}:tripped", "1", ex=86400)
+        p.delete(f"circuit:{name}:failures", f"circuit:{name}:probe")
+        p.hincrby("circuit:opened", name, 1)
+        p.execute()
+    except Exception as e:
+        LOG.warning(f"could not record failure for {name}: {e!r}")
+
+
+def get_circuit_states():
+    names = sorted(i.decode() for i in REDIS.smembers("circuit:endpoints"))
+    p = REDIS.pipeline(transaction=False)
+    for name in names:
+        p.exists(f"circuit:{name}:open")
+        p.exists(f"circuit:{name}:tripped")
+        p.get(f"circuit:{name}:failures")
+        p.hget("circuit:opened", name)
+    result = iter(p.execute())
+
+    states = {}
+    for name, is_open, tripped, failures, opened in zip(
+        names, result, result, result, result
+    ):
+        states[name] = {
+            "state": OPEN if is_open else HALF_OPEN if tripped else CLOSED,
+            "failures": int(failures or 0),
+            "opened": int(opened or 0),
+        }
+    return states
@@ -0,0 +1,49 @@
+import gzip
+
+from flask import request
+
+from conf import CONFIG
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MIMETYPES = ("application/json", "text/html")
+
+
+def compress_response(response):
+    # nginx runs with "proxy_buffering off", so it won't compress our
+    # responses for us. Do it here instead, but only for dynamic content
+    # that is worth compressing.
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or response.is_streamed
+        or response.mimetype not in COMPRESS_MIMETYPES
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+
+    data = response.get_data()
+    if len(data) < CONFIG.get("COMPRESS_MIN_SIZE", 1024):
+        return response
+
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        response.set_data(brotli.compress(data, quality=5))
+        response.headers["Content-Encoding"] = "br"
+    elif accepted["gzip"]:
+        response.set_data(gzip.compress(data, compresslevel=6))
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        return response
+
+    # the compressed body is not byte-identical to the original one
+    etag, _ = response.get_etag()
+    if etag:
+        response.set_etag(etag, weak=True)
+
+    return response
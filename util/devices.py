@@ -0,0 +1,122 @@
+from json import dumps, loads
+from logging import getLogger
+from os import getpid
+from socket import gethostname
+from time import sleep, time
+
+from conf import CONFIG
+
+from .ib_hosted import ib
+from .playstats import room_by_device
+from .redis import REDIS
+
+LOG = getLogger("Devices")
+
+# Every DEVICE_POLL_INTERVAL seconds, one process fetches device/list
+# and keeps a small summary of each device in redis. Each frontend
+# worker runs the poller, but only the one holding the lock in redis
+# actually polls. If that worker goes away, another one takes over once
+# the lock has expired. Metrics and /api/devices only read from redis,
+# so no request ever waits for info-beamer.
+STATE_KEY = "devices:state"
+POLLED_KEY = "devices:polled"
+LEADER_KEY = "lock:devices:poller"
+
+# Takes the lock if it is free, or extends it if we already hold it.
+# Checking the owner and extending have to be one step, otherwise the
+# lock could expire and be taken by another worker in between.
+LEAD = REDIS.register_script(
+    """
+if redis.call("SET", KEYS[1], ARGV[1], "NX", "EX", ARGV[2]) then
+    return 1
+end
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    redis.call("EXPIRE", KEYS[1], ARGV[2])
+    return 1
+end
+return 0
+"""
+)
+
+
+def poll_devices():
+    devices = ib.get("device/list")["devices"]
+    _, previous = get_devices()
+    now = int(time())
+
+    state = {}
+    for device in devices:
+        if device["is_online"]:
+            last_seen = now
+        else:
+            last_seen = previous.get(device["id"], {}).get("last_seen")
+        state[device["id"]] = dumps(
+            {
+                "online": device["is_online"],
+                "last_seen": last_seen,
+                "setup_id": (device.get("setup") or {}).get("id"),
+                "description": device.get("description", ""),
+                "model": (device.get("hw") or {}).get("model", "unknown"),
+            },
+            separators=(",", ":"),
+        )
+
+    p = REDIS.pipeline()
+    p.delete(STATE_KEY)
+    if state:
+        p.hset(STATE_KEY, mapping=state)
+    p.set(POLLED_KEY, now)
+    p.execute()
+    return len(state)
+
+
+def get_devices():
+    """Returns when the devices were polled last, and their state by
+    device id."""
+    p = REDIS.pipeline(transaction=False)
+    p.get(POLLED_KEY)
+    p.hgetall(STATE_KEY)
+    polled, state = p.execute()
+    return (
+        int(polled) if polled is not None else None,
+        {int(device_id): loads(value) for device_id, value in state.items()},
+    )
+
+
+def known_device_ids():
+    """Devices in our account, as far as the poller has seen them, and
+    the ones configured in ROOMS."""
+    return set(room_by_device()) | {int(i) for i in REDIS.hkeys(STATE_KEY)}
+
+
+def get_device_list():
+    polled, devices = get_devices()
+    rooms = room_by_device()
+    return {
+        "polled": polled,
+        "devices": [
+            {"id": device_id, "room": rooms.get(device_id)} | device
+            for device_id, device in sorted(devices.items())
+        ],
+    }
+
+
+def _lead(token, ttl):
+    return bool(LEAD(keys=[LEADER_KEY], args=[token, ttl]))
+
+
+def run_poller():
+    token = f"{gethostname()}:{getpid()}"
+    while True:
+        interval = CONFIG.get("DEVICE_POLL_INTERVAL", 30)
+        if not interval:
+            LOG.info("device poller disabled")
+            return
+        try:
+            # the lock outlives a few missed polls, so leadership
+            # doesn't move around because of a slow request
+            if _lead(token, interval * 3):
+                poll_devices()
+        except Exception:
+            LOG.exception("polling devices failed")
+        sleep(interval)
@@ -0,0 +1,71 @@
+from json import dumps, loads
+from logging import getLogger
+from queue import Empty, Full, Queue
+from threading import Lock, Thread
+from time import sleep
+
+from .redis import REDIS
+
+CHANNEL = "events"
+LOG = getLogger("Events")
+
+
+def publish_event(event, **data):
+    try:
+        REDIS.publish(CHANNEL, dumps({"event": event, "data": data}))
+    except Exception:
+        # events are a nice-to-have, clients fall back to polling
+        LOG.exception(f"could not publish {event} event")
+
+
+class EventBroker:
+    """Fans out events from a single redis pubsub subscription per worker
+    to all clients connected to that worker."""
+
+    def __init__(self):
+        self.lock = Lock()
+        self.listeners = set()
+        self.thread = None
+
+    def _run(self):
+        while True:
+            try:
+                pubsub = REDIS.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(CHANNEL)
+                for message in pubsub.listen():
+                    for queue in list(self.listeners):
+                        try:
+                            queue.put_nowait(message["data"])
+                        except Full:
+                            # client is too slow, it will catch up
+                            # through polling
+                            pass
+            except Exception:
+                LOG.exception("redis subscription failed, retrying")
+                sleep(1)
+
+    def stream(self, keepalive=15):
+        queue = Queue(maxsize=100)
+        with self.lock:
+            if self.thread is None:
+                self.thread = Thread(target=self._run, daemon=True)
+                self.thread.start()
+            self.listeners.add(queue)
+
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    payload = loads(queue.get(timeout=keepalive))
+                except Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                yield "event: {}\ndata: {}\n\n".format(
+                    payload["event"], dumps(payload["data"])
+                )
+        finally:
+            with self.lock:
+                self.listeners.discard(queue)
+
+
+BROKER = EventBroker()
@@ -1,70 +1,328 @@
+import os
+import random
+import tempfile
+from json import dumps as json_dumps
 from json import loads as json_loads
 from logging import getLogger
-from threading import Lock
+from secrets import token_hex
+from threading import Thread
+from time import sleep, time
 
-from requests import Session
+from redis.exceptions import LockError
+from requests import ConnectionError, HTTPError, Session, Timeout
+from requests.adapters import HTTPAdapter
 
-from conf import CONFIG
+from conf import CONFIG, on_config_reload
 
+from .circuit import check_circuit, endpoint_name, record_failure, record_success
+from .ratelimit import take_token, upstream_class
 from .redis import REDIS
 
 
+class AssetNotFound(Exception):
+    pass
+
+
 class IBHosted:
     def __init__(self):
         self._session = Session()
         self._session.auth = "", CONFIG["HOSTED_API_KEY"]
+        self._pool_size = None
+        self.configure()
+        on_config_reload(self.configure)
         self.log = getLogger("IBHosted")
 
-    def get(self, ep, **params):
-        self.log.debug(f'get("{ep}", {params})')
-        r = self._session.get(
-            f"https://info-beamer.com/api/v1/{ep}", params=params, timeout=5
+    def configure(self):
+        # every greenlet of a worker may talk to info-beamer at the
+        # same time, keep enough connections around for all of them
+        pool_size = CONFIG.get("IB_POOL_SIZE", 20)
+        if pool_size != self._pool_size:
+            self._pool_size = pool_size
+            self._session.mount("https://", HTTPAdapter(pool_maxsize=pool_size))
+
+    def _request(self, method, ep, **kwargs):
+        name = endpoint_name(ep)
+        check_circuit(name)
+
+        # only GET requests are safe to retry
+        retries = CONFIG.get("IB_RETRIES", 2) if method == "GET" else 0
+        timeout = (
+            CONFIG.get("IB_CONNECT_TIMEOUT", 2),
+            CONFIG.get("IB_READ_TIMEOUT", 5),
         )
-        self.log.debug(r.text)
-        r.raise_for_status()
-        return r
+        for attempt in range(retries + 1):
+            if attempt:
+                # exponential backoff with jitter, so workers don't all
+                # retry at the same moment
+                backoff = CONFIG.get("IB_RETRY_BACKOFF", 0.25) * 2 ** (attempt - 1)
+                sleep(backoff * random.uniform(0.5, 1.5))
+            take_token(upstream_class(method, ep))
+            try:
+                r = self._session.request(
+                    method,
+                    f"https://info-beamer.com/api/v1/{ep}",
+                    timeout=timeout,
+                    **kwargs,
+                )
+                self.log.debug(r.text)
+                r.raise_for_status()
+            except (ConnectionError, Timeout) as e:
+                self.log.warning(f"{method} {ep} failed: {e!r}")
+                failure = e
+            except HTTPError as e:
+                if e.response.status_code < 500 and e.response.status_code != 429:
+                    # our fault, not info-beamer's
+                    record_success(name)
+                    raise
+                self.log.warning(f"{method} {ep} failed: {e!r}")
+                failure = e
+            else:
+                record_success(name)
+                return r
+
+        record_failure(name)
+        raise failure
+
+    def get(self, ep, headers=None, **params):
+        self.log.debug(f'get("{ep}", {params})')
+        return self._request("GET", ep, params=params, headers=headers)
 
     def post(self, ep, **data):
         self.log.debug(f'post("{ep}")')
-        r = self._session.post(
-            f"https://info-beamer.com/api/v1/{ep}", data=data, timeout=5
-        )
-        self.log.debug(r.text)
-        r.raise_for_status()
-        return r
+        return self._request("POST", ep, data=data)
 
     def delete(self, ep, **data):
         self.log.debug(f'delete("{ep}")')
-        r = self._session.delete(
-            f"https://info-beamer.com/api/v1/{ep}", data=data, timeout=5
-        )
-        self.log.debug(r.text)
-        r.raise_for_status()
-        return r
+        return self._request("DELETE", ep, data=data)
 
 
 class IBHostedCached:
+    # Endpoints we keep a long-lived stale copy of, in redis and on disk.
+    # If their cache has expired, we answer from the stale copy and
+    # refresh it in the background. If info-beamer is unreachable, we
+    # keep using the stale copy. The copy on disk survives redis
+    # restarts, so we have something to serve right after startup.
+    SNAPSHOT_ENDPOINTS = ("asset/list", "device/list")
+
     def __init__(self):
         self.ib = IBHosted()
-        self.lock_access_lock = Lock()
-        self.locks = {}
+        self.log = getLogger("IBHostedCached")
+
+    @property
+    def snapshot_path(self):
+        return CONFIG.get("SNAPSHOT_PATH", "snapshots")
+
+    @property
+    def stale_ttl(self):
+        return CONFIG.get("SNAPSHOT_MAX_AGE", 86400)
+
+    def _snapshot_file(self, ep):
+        return os.path.join(self.snapshot_path, ep.replace("/", "_") + ".json")
+
+    def _write_snapshot(self, ep, text):
+        REDIS.set(f"ibh:stale:{ep}", text, ex=self.stale_ttl)
+        # the copy on disk is only needed if redis is gone, too. Don't
+        # rewrite it on every fetch.
+        try:
+            if time() - os.path.getmtime(self._snapshot_file(ep)) < CONFIG.get(
+                "SNAPSHOT_WRITE_INTERVAL", 300
+            ):
+                return
+        except OSError:
+            pass
+        try:
+            os.makedirs(self.snapshot_path, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                "w", dir=self.snapshot_path, delete=False
+            ) as f:
+                f.write(text)
+            os.replace(f.name, self._snapshot_file(ep))
+        except OSError as e:
+            self.log.warning(f"could not write snapshot of {ep}: {e!r}")
+
+    def load_snapshots(self):
+        """Load the snapshots from disk into redis, unless redis has a
+        (newer) copy already."""
+        for ep in self.SNAPSHOT_ENDPOINTS:
+            try:
+                with open(self._snapshot_file(ep)) as f:
+                    age = time() - os.fstat(f.fileno()).st_mtime
+                    text = f.read()
+            except OSError:
+                continue
+            if age >= self.stale_ttl:
+                continue
+            ttl = int(self.stale_ttl - age) + 1
+            if REDIS.set(f"ibh:stale:{ep}", text, ex=ttl, nx=True):
+                self._new_version(ep)
+                self.log.info(f"loaded snapshot of {ep} from disk")
+
+    def _lock(self, ep):
+        # not thread local, background refreshes release the lock in
+        # another thread than the one which acquired it
+        return REDIS.lock(
+            f"lock:ibh:{ep}", timeout=30, blocking_timeout=10, thread_local=False
+        )
+
+    def _refresh_in_background(self, ep, **params):
+        # if someone is fetching this already, there's nothing to do
+        lock = self._lock(ep)
+        if not lock.acquire(blocking=False):
+            return
+
+        def refresh():
+            try:
+                # someone else might have refreshed it just before
+                if not REDIS.exists(f"ibh:{ep}"):
+                    self._fetch_locked(ep, **params)
+            except Exception as e:
+                self.log.warning(f"background refresh of {ep} failed: {e!r}")
+            finally:
+                self._release(lock)
+
+        Thread(target=refresh, daemon=True).start()
 
     def get(self, ep, cached=False, **params):
-        with self.lock_access_lock:
-            if not self.locks.get(ep):
-                self.locks[ep] = Lock()
+        if cached:
+            cached_result = REDIS.get(f"ibh:{ep}")
+            if cached_result is not None:
+                return json_loads(cached_result)
+            if ep in self.SNAPSHOT_ENDPOINTS:
+                stale_result = REDIS.get(f"ibh:stale:{ep}")
+                if stale_result is not None:
+                    self._refresh_in_background(ep, **params)
+                    return json_loads(stale_result)
+
+        try:
+            return self._fetch(ep, cached=cached, **params)
+        except Exception as e:
+            if ep not in self.SNAPSHOT_ENDPOINTS or (
+                isinstance(e, HTTPError) and e.response.status_code < 500
+            ):
+                raise
+            stale_result = REDIS.get(f"ibh:stale:{ep}")
+            if stale_result is None:
+                try:
+                    with open(self._snapshot_file(ep)) as f:
+                        stale_result = f.read()
+                except OSError:
+                    raise e
+            self.log.warning(f"could not fetch {ep}, using snapshot: {e!r}")
+            return json_loads(stale_result)
+
+    def version(self, ep):
+        """Random id which changes whenever the cached result of the
+        endpoint might have changed. Lets callers keep things they
+        derived from it until then."""
+        version = REDIS.get(f"ibh:version:{ep}")
+        return version.decode() if version is not None else None
+
+    def _new_version(self, ep):
+        REDIS.set(f"ibh:version:{ep}", token_hex(8))
 
-        cached_result = REDIS.get(f"ibh:{ep}")
-        if cached_result is not None and cached:
-            return json_loads(cached_result)
+    def invalidate(self, ep):
+        # We know the cached data has changed, so don't serve any of the
+        # old copies. Otherwise deleted or rejected assets could show up
+        # again if info-beamer fails right now.
+        REDIS.delete(f"ibh:{ep}", f"ibh:stale:{ep}")
+        self._new_version(ep)
+        try:
+            os.unlink(self._snapshot_file(ep))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self.log.warning(f"could not remove snapshot of {ep}: {e!r}")
 
+    def _fetch(self, ep, cached, **params):
         # make sure we only ever run one get() per endpoint at the same
-        # time to avoid doing too many requests.
-        with self.locks[ep]:
-            result = self.ib.get(ep, **params)
-            # store result into redis database, set it to expire after 60 seconds
-            REDIS.set(f"ibh:{ep}", result.text, ex=60)
-            return result.json()
+        # time to avoid doing too many requests. The lock lives in redis,
+        # so this holds for all workers on all nodes.
+        version = self.version(ep)
+        lock = self._lock(ep)
+        acquired = lock.acquire()
+        if not acquired:
+            self.log.warning(f"timed out waiting for the lock on {ep}, fetching anyway")
+        try:
+            # If someone else fetched it while we waited, use their result,
+            # even for uncached calls, instead of asking info-beamer again.
+            if cached or self.version(ep) != version:
+                cached_result = REDIS.get(f"ibh:{ep}")
+                if cached_result is not None:
+                    return json_loads(cached_result)
+            return self._fetch_locked(ep, **params)
+        finally:
+            if acquired:
+                self._release(lock)
+
+    def _fetch_locked(self, ep, **params):
+        result = self.ib.get(ep, **params)
+        # store result into redis database, set it to expire after 60 seconds
+        REDIS.set(f"ibh:{ep}", result.text, ex=60)
+        self._new_version(ep)
+        if ep in self.SNAPSHOT_ENDPOINTS:
+            self._write_snapshot(ep, result.text)
+        return result.json()
+
+    def _release(self, lock):
+        try:
+            lock.release()
+        except LockError:
+            pass
+
+    def get_asset(self, asset_id):
+        """Get a single asset. Assets we've seen in the last
+        ASSET_CACHE_FRESH seconds are served from redis, older ones get
+        revalidated using their ETag. Assets which don't exist are
+        remembered for ASSET_CACHE_NOT_FOUND seconds. Raises
+        AssetNotFound if the asset does not exist."""
+        key = f"ibh:asset:{asset_id}"
+        cached = REDIS.get(key)
+        if cached is not None:
+            cached = json_loads(cached)
+            if cached["asset"] is None:
+                raise AssetNotFound(asset_id)
+            if time() - cached["fetched"] < CONFIG.get("ASSET_CACHE_FRESH", 10):
+                return cached["asset"]
+
+        headers = {}
+        if cached is not None and cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        try:
+            r = self.ib.get(f"asset/{asset_id}", headers=headers)
+        except Exception as e:
+            if isinstance(e, HTTPError) and e.response.status_code == 404:
+                REDIS.set(
+                    key,
+                    json_dumps({"asset": None}),
+                    ex=CONFIG.get("ASSET_CACHE_NOT_FOUND", 10),
+                )
+                raise AssetNotFound(asset_id)
+            # info-beamer is unhealthy, the copy we have is better than
+            # nothing
+            if cached is None:
+                raise
+            self.log.warning(f"could not revalidate asset {asset_id}: {e!r}")
+            return cached["asset"]
+
+        if r.status_code == 304:
+            asset = cached["asset"]
+        else:
+            asset = r.json()
+        self._store_asset(asset, r.headers.get("ETag"))
+        return asset
+
+    def update_asset(self, asset):
+        """Replace the cached copy of an asset after we've changed it.
+        We don't know the new ETag, so it gets fetched again once it's
+        no longer fresh."""
+        self._store_asset(asset, None)
+
+    def _store_asset(self, asset, etag):
+        REDIS.set(
+            f"ibh:asset:{asset['id']}",
+            json_dumps({"asset": asset, "etag": etag, "fetched": time()}),
+            ex=3600,
+        )
 
     def post(self, ep, **params):
         return self.ib.post(ep, **params).json()
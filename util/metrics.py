@@ -0,0 +1,244 @@
+from collections import defaultdict
+from typing import Iterable
+
+from prometheus_client import generate_latest
+from prometheus_client.core import (
+    REGISTRY,
+    CounterMetricFamily,
+    GaugeMetricFamily,
+    HistogramMetricFamily,
+)
+from prometheus_client.metrics_core import Metric
+from prometheus_client.registry import Collector
+
+from . import State, get_assets
+from .circuit import get_circuit_states
+from .devices import get_devices
+from .playstats import get_play_stats, room_by_device
+from .ratelimit import get_rate_limit_stats
+from .sso.client import get_sso_stats
+from .transitions import get_histograms, oldest_age
+
+
+class SubmissionsCollector(Collector):
+    def collect(self) -> Iterable[Metric]:
+        counts = defaultdict(int)
+        for a in get_assets():
+            counts[a.state] += 1
+        g = GaugeMetricFamily(
+            "submissions", "Counts of content submissions", labels=["state"]
+        )
+        for state in State:
+            # Add any states that we know about but have 0 assets in them
+            if state.value not in counts.keys():
+                counts[state.value] = 0
+        for s, c in counts.items():
+            g.add_metric([s], c)
+        yield g
+
+
+class InfobeamerCollector(Collector):
+    """Prometheus collector for infobeamer devices, as seen by the device poller."""
+
+    def collect(self) -> Iterable[Metric]:
+        polled, devices = get_devices()
+        rooms = room_by_device()
+        yield GaugeMetricFamily("devices", "Infobeamer devices", len(devices))
+        yield GaugeMetricFamily(
+            "devices_online",
+            "Infobeamer devices online",
+            len([d for d in devices.values() if d["online"]]),
+        )
+        if polled is not None:
+            yield GaugeMetricFamily(
+                "devices_polled_timestamp_seconds",
+                "When the device list was last fetched from info-beamer",
+                polled,
+            )
+        m = GaugeMetricFamily(
+            "device_model", "Infobeamer device models", labels=["model"]
+        )
+        counts = defaultdict(int)
+        for d in devices.values():
+            counts[d["model"]] += 1
+        for model, count in counts.items():
+            m.add_metric([model], count)
+        yield m
+
+        online = GaugeMetricFamily(
+            "device_online",
+            "Whether a device is online",
+            labels=["device_id", "description", "room"],
+        )
+        last_seen = GaugeMetricFamily(
+            "device_last_seen_timestamp_seconds",
+            "When a device was last seen online",
+            labels=["device_id"],
+        )
+        setup = GaugeMetricFamily(
+            "device_setup_id", "The setup a device is running", labels=["device_id"]
+        )
+        for device_id, d in devices.items():
+            online.add_metric(
+                [str(device_id), d["description"], rooms.get(device_id, "")],
+                int(d["online"]),
+            )
+            if d["last_seen"] is not None:
+                last_seen.add_metric([str(device_id)], d["last_seen"])
+            if d["setup_id"] is not None:
+                setup.add_metric([str(device_id)], d["setup_id"])
+        yield online
+        yield last_seen
+        yield setup
+
+
+class PlayStatsCollector(Collector):
+    """Prometheus collector for play counts from the proof of play rollups."""
+
+    def collect(self) -> Iterable[Metric]:
+        stats = get_play_stats(hours=24)
+        plays = GaugeMetricFamily(
+            "asset_plays_24h",
+            "How often an asset was shown in the last 24 hours",
+            labels=["asset_id"],
+        )
+        devices = GaugeMetricFamily(
+            "asset_devices_24h",
+            "Approximate number of devices which showed an asset in the last 24 hours",
+            labels=["asset_id"],
+        )
+        for asset_id, asset in stats["assets"].items():
+            plays.add_metric([asset_id], asset["plays"])
+            devices.add_metric([asset_id], asset["devices"])
+        yield plays
+        yield devices
+
+        rooms = GaugeMetricFamily(
+            "room_plays_24h",
+            "How many assets were shown per room in the last 24 hours",
+            labels=["room"],
+        )
+        for room, count in stats["rooms"].items():
+            rooms.add_metric([room], count)
+        yield rooms
+
+
+class RateLimitCollector(Collector):
+    """Prometheus collector for the token buckets in front of the info-beamer API."""
+
+    def collect(self) -> Iterable[Metric]:
+        stats = get_rate_limit_stats()
+        requests_total = CounterMetricFamily(
+            "ratelimit_requests",
+            "Requests checked against a rate limit",
+            labels=["bucket", "result"],
+        )
+        limit = GaugeMetricFamily(
+            "ratelimit_burst", "Size of the token buckets", labels=["bucket"]
+        )
+        rate = GaugeMetricFamily(
+            "ratelimit_per_minute",
+            "Tokens added to the buckets per minute",
+            labels=["bucket"],
+        )
+        tokens = GaugeMetricFamily(
+            "ratelimit_tokens",
+            "Tokens left in the global upstream buckets",
+            labels=["bucket"],
+        )
+        for bucket, s in stats.items():
+            requests_total.add_metric([bucket, "allowed"], s["allowed"])
+            requests_total.add_metric([bucket, "rejected"], s["rejected"])
+            limit.add_metric([bucket], s["burst"])
+            rate.add_metric([bucket], s["per_minute"])
+            if s["tokens"] is not None:
+                tokens.add_metric([bucket], s["tokens"])
+        yield requests_total
+        yield limit
+        yield rate
+        yield tokens
+
+
+class CircuitCollector(Collector):
+    """Prometheus collector for the circuit breakers in front of the info-beamer API."""
+
+    def collect(self) -> Iterable[Metric]:
+        states = get_circuit_states()
+        state = GaugeMetricFamily(
+            "ib_circuit_state",
+            "State of the circuit breaker (0 closed, 1 open, 2 half-open)",
+            labels=["endpoint"],
+        )
+        failures = GaugeMetricFamily(
+            "ib_circuit_failures",
+            "Recent failed requests counting towards opening the circuit",
+            labels=["endpoint"],
+        )
+        opened = CounterMetricFamily(
+            "ib_circuit_opened",
+            "How often the circuit breaker has opened",
+            labels=["endpoint"],
+        )
+        for endpoint, s in states.items():
+            state.add_metric([endpoint], s["state"])
+            failures.add_metric([endpoint], s["failures"])
+            opened.add_metric([endpoint], s["opened"])
+        yield state
+        yield failures
+        yield opened
+
+
+class ModerationCollector(Collector):
+    """Prometheus collector for moderation latency, from the recorded state transitions."""
+
+    def collect(self) -> Iterable[Metric]:
+        for name, histogram in get_histograms().items():
+            yield HistogramMetricFamily(
+                name,
+                histogram["doc"],
+                buckets=histogram["buckets"],
+                sum_value=histogram["sum"],
+            )
+
+        waiting = [a.id for a in get_assets(cached=True) if a.state == State.REVIEW]
+        yield GaugeMetricFamily(
+            "moderation_oldest_review_age_seconds",
+            "Time the oldest asset awaiting moderation has been waiting",
+            oldest_age(waiting, State.REVIEW) or 0,
+        )
+
+
+class SSOCollector(Collector):
+    """Prometheus collector for request times to the SSO providers."""
+
+    def collect(self) -> Iterable[Metric]:
+        latency = HistogramMetricFamily(
+            "sso_request_seconds",
+            "Time requests to the SSO providers took",
+            labels=["provider", "endpoint"],
+        )
+        errors = CounterMetricFamily(
+            "sso_request_errors",
+            "Requests to the SSO providers which failed or timed out",
+            labels=["provider", "endpoint"],
+        )
+        for (provider, endpoint), stats in get_sso_stats().items():
+            latency.add_metric(
+                [provider, endpoint], stats["buckets"], sum_value=stats["sum"]
+            )
+            errors.add_metric([provider, endpoint], stats["errors"])
+        yield latency
+        yield errors
+
+
+REGISTRY.register(SubmissionsCollector())
+REGISTRY.register(InfobeamerCollector())
+REGISTRY.register(PlayStatsCollector())
+REGISTRY.register(RateLimitCollector())
+REGISTRY.register(CircuitCollector())
+REGISTRY.register(ModerationCollector())
+REGISTRY.register(SSOCollector())
+
+
+def generate_metrics():
+    return generate_latest()
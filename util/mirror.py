@@ -0,0 +1,200 @@
+import os
+import shutil
+import tempfile
+from hashlib import file_digest, sha256
+from logging import getLogger
+from threading import Lock, Thread
+from time import sleep
+
+import requests
+from redis.exceptions import LockError
+
+from conf import CONFIG
+
+from .ib_hosted import ib
+from .redis import REDIS
+
+LOG = getLogger("Mirror")
+INVALIDATION_CHANNEL = "mirror"
+
+
+class LocalMirror:
+    """Mirrors assets from info-beamer into a local directory, which
+    gets served as /static by nginx. Enough if there's only one node."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def local_path(self, filename):
+        return os.path.join(self.path, filename)
+
+    def _download(self, asset_id, target):
+        LOG.info(f"fetching {asset_id} to {target}")
+        dl = ib.get(f"asset/{asset_id}/download")
+        r = requests.get(dl["download_url"], stream=True, timeout=5)
+        r.raise_for_status()
+        content_hash = sha256()
+        with tempfile.NamedTemporaryFile(
+            dir=os.path.dirname(target), delete=False
+        ) as f:
+            for chunk in iter(lambda: r.raw.read(65536), b""):
+                content_hash.update(chunk)
+                f.write(chunk)
+        os.chmod(f.name, 0o664)
+        self._record_hash(asset_id, os.path.basename(target), content_hash.hexdigest())
+        self._store(f.name, target, content_hash.hexdigest())
+
+    def _store(self, tmp_file, target, content_hash):
+        # People upload the same file over and over again. If we have
+        # a file with the same content already, link to that one, so
+        # it's stored on disk only once.
+        duplicate = self._find_duplicate_file(target, content_hash)
+        if duplicate is not None:
+            link = f"{tmp_file}.link"
+            try:
+                os.link(duplicate, link)
+                os.replace(link, tmp_file)
+                LOG.info(f"{target} is a duplicate of {duplicate}, linked")
+            except OSError as e:
+                LOG.warning(f"could not link {target} to {duplicate}: {e!r}")
+        os.replace(tmp_file, target)
+
+    def _find_duplicate_file(self, target, content_hash):
+        directory = os.path.dirname(target)
+        for filename in REDIS.hvals(f"mirror:files:{content_hash}"):
+            candidate = os.path.join(directory, filename.decode())
+            if candidate != target and os.path.exists(candidate):
+                return candidate
+        return None
+
+    def _record_hash(self, asset_id, filename, content_hash):
+        p = REDIS.pipeline(transaction=False)
+        p.hset("mirror:hash", asset_id, content_hash)
+        p.hset(f"mirror:files:{content_hash}", asset_id, filename)
+        p.execute()
+
+    def content_hash(self, asset_id, filename):
+        """sha256 of the asset's content, if we have mirrored it. Files
+        mirrored before we started recording hashes get hashed now."""
+        content_hash = REDIS.hget("mirror:hash", asset_id)
+        if content_hash is not None:
+            return content_hash.decode()
+        try:
+            with open(self.local_path(filename), "rb") as f:
+                content_hash = file_digest(f, "sha256").hexdigest()
+        except FileNotFoundError:
+            return None
+        self._record_hash(asset_id, filename, content_hash)
+        return content_hash
+
+    def assets_with_hash(self, content_hash):
+        return [
+            int(asset_id) for asset_id in REDIS.hkeys(f"mirror:files:{content_hash}")
+        ]
+
+    def _fetch(self, asset_id, filename):
+        self._download(asset_id, self.local_path(filename))
+
+    def ensure(self, asset_id, filename):
+        """Make sure the asset is available locally."""
+        if os.path.exists(self.local_path(filename)):
+            return
+
+        # Only one worker (on any node) downloads a file at a time. The
+        # others wait for it and use the file it downloaded.
+        lock = REDIS.lock(f"lock:mirror:{filename}", timeout=60, blocking_timeout=30)
+        acquired = lock.acquire()
+        try:
+            if not os.path.exists(self.local_path(filename)):
+                self._fetch(asset_id, filename)
+        finally:
+            if acquired:
+                try:
+                    lock.release()
+                except LockError:
+                    pass
+
+    def remove(self, filename):
+        self.invalidate(filename)
+
+    def invalidate(self, filename):
+        try:
+            os.remove(self.local_path(filename))
+            LOG.info(f"removed {filename}")
+        except FileNotFoundError:
+            pass
+
+
+class SharedMirror(LocalMirror):
+    """Keeps the mirrored assets in a directory which all nodes share,
+    for example an NFS mount. Each node keeps a local copy for nginx.
+    Deletions get announced through redis, so all nodes drop their
+    local copy. For testing, the shared directory can be any local
+    directory."""
+
+    def __init__(self, path, shared_path):
+        super().__init__(path)
+        self.shared_path = shared_path
+        self.listener_lock = Lock()
+        self.listener = None
+
+    def shared_file(self, filename):
+        return os.path.join(self.shared_path, filename)
+
+    def ensure(self, asset_id, filename):
+        self._start_listener()
+        super().ensure(asset_id, filename)
+
+    def _fetch(self, asset_id, filename):
+        if not os.path.exists(self.shared_file(filename)):
+            self._download(asset_id, self.shared_file(filename))
+        with tempfile.NamedTemporaryFile(dir=self.path, delete=False) as f:
+            with open(self.shared_file(filename), "rb") as src:
+                content_hash = file_digest(src, "sha256").hexdigest()
+                src.seek(0)
+                shutil.copyfileobj(src, f)
+        os.chmod(f.name, 0o664)
+        self._store(f.name, self.local_path(filename), content_hash)
+
+    def remove(self, filename):
+        try:
+            os.remove(self.shared_file(filename))
+        except FileNotFoundError:
+            pass
+        self.invalidate(filename)
+        REDIS.publish(INVALIDATION_CHANNEL, filename)
+
+    def _start_listener(self):
+        with self.listener_lock:
+            if self.listener is None:
+                self.listener = Thread(target=self._listen, daemon=True)
+                self.listener.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = REDIS.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                # we might have missed some invalidations while we were
+                # not running
+                for filename in os.listdir(self.path):
+                    if filename.startswith("asset-") and not os.path.exists(
+                        self.shared_file(filename)
+                    ):
+                        self.invalidate(filename)
+                for message in pubsub.listen():
+                    self.invalidate(os.path.basename(message["data"].decode()))
+            except Exception:
+                LOG.exception("mirror invalidation listener failed, retrying")
+                sleep(1)
+
+
+def get_mirror():
+    path = CONFIG.get("STATIC_PATH", "static")
+    config = CONFIG.get("MIRROR", {})
+    if config.get("BACKEND", "local") == "shared":
+        return SharedMirror(path, config["SHARED_PATH"])
+    return LocalMirror(path)
+
+
+MIRROR = get_mirror()
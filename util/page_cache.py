@@ -0,0 +1,57 @@
+from datetime import datetime, timezone
+from functools import wraps
+from hashlib import sha256
+from time import time
+
+from flask import g, make_response, request, session
+
+from conf import CONFIG
+
+from .release import get_current_release
+
+# rendered pages, keyed by route, release and whether submissions are
+# open yet. Values are (expires, etag, last_modified, html).
+_cache = {}
+
+
+def cached_anonymous_page(f):
+    """Cache the rendered page for users which are not logged in. The
+    page has to look the same for all of them."""
+
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if g.userid or session.get("_flashes"):
+            resp = make_response(f(*args, **kwargs))
+            resp.headers["Cache-Control"] = "private, no-cache"
+            return resp
+
+        now = time()
+        key = (
+            request.path,
+            get_current_release(),
+            CONFIG["TIME_MIN"] > datetime.now(timezone.utc).timestamp(),
+        )
+        cached = _cache.get(key)
+        if cached is None or cached[0] < now:
+            html = make_response(f(*args, **kwargs)).get_data()
+            etag = sha256(html).hexdigest()[:32]
+            if cached is not None and cached[1] == etag:
+                last_modified = cached[2]
+            else:
+                last_modified = datetime.fromtimestamp(int(now), timezone.utc)
+            cached = (now + CONFIG.get("PAGE_CACHE_TTL", 60), etag, last_modified, html)
+            for k in [k for k, v in _cache.items() if v[0] < now]:
+                del _cache[k]
+            _cache[key] = cached
+
+        _, etag, last_modified, html = cached
+        resp = make_response(html)
+        resp.set_etag(etag)
+        resp.last_modified = last_modified
+        # Browsers and proxies may keep the page, but need to check back
+        # with us, because the page looks different after logging in.
+        resp.headers["Cache-Control"] = "public, no-cache"
+        resp.vary.add("Cookie")
+        return resp.make_conditional(request)
+
+    return decorated_function
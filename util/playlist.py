@@ -0,0 +1,100 @@
+from time import time
+
+from conf import CONFIG
+
+from .playstats import get_play_stats
+from .redis import REDIS
+
+# If there are more live assets than PLAYLIST_MAX_PAGES, only some of
+# them get shown at a time. Which ones is decided by stride scheduling:
+# every asset has a "pass" value, the assets with the lowest values get
+# picked and their pass grows by 1/weight. Assets with a higher weight
+# get picked more often, all others still get their turn. The window
+# only moves on every PLAYLIST_ROTATION seconds, syncs in between keep
+# it and only replace assets which are no longer live.
+
+
+def asset_weights(assets):
+    """Fresh assets (first seen less than PLAYLIST_FRESH_HOURS ago) and
+    assets which have been shown less than average in the last 24 hours
+    get a higher weight."""
+    now = time()
+    live_ids = {asset.id for asset in assets}
+    p = REDIS.pipeline(transaction=False)
+    for asset in assets:
+        p.hsetnx("playlist:first_seen", asset.id, int(now))
+    p.hgetall("playlist:first_seen")
+    first_seen = {int(k): int(v) for k, v in p.execute()[-1].items()}
+    # assets which are not live anymore count as fresh once they are
+    # live again
+    gone = set(first_seen) - live_ids
+    if gone:
+        REDIS.hdel("playlist:first_seen", *gone)
+
+    plays = {
+        int(asset_id): stats["plays"]
+        for asset_id, stats in get_play_stats(hours=24)["assets"].items()
+    }
+    average = sum(plays.get(asset_id, 0) for asset_id in live_ids) / len(live_ids)
+
+    fresh_since = now - CONFIG.get("PLAYLIST_FRESH_HOURS", 6) * 3600
+    weights = {}
+    for asset_id in live_ids:
+        weight = 1
+        if first_seen[asset_id] > fresh_since:
+            weight *= CONFIG.get("PLAYLIST_FRESH_WEIGHT", 2)
+        if plays.get(asset_id, 0) < average:
+            weight *= CONFIG.get("PLAYLIST_UNDERPLAYED_WEIGHT", 1.5)
+        weights[asset_id] = weight
+    return weights
+
+
+def compile_playlist(assets):
+    """Returns the assets which should be shown right now, in the order
+    they should be shown in."""
+    max_pages = CONFIG.get("PLAYLIST_MAX_PAGES", 0)
+    if not max_pages or len(assets) <= max_pages:
+        return assets
+
+    by_id = {asset.id: asset for asset in assets}
+    passes = {
+        int(asset_id): float(value)
+        for asset_id, value in REDIS.hgetall("playlist:pass").items()
+        if int(asset_id) in by_id
+    }
+    # new assets start at the current minimum, so they don't have to
+    # wait long for their turn, but they also can't hog the playlist
+    start = min(passes.values(), default=0)
+    for asset_id in by_id:
+        passes.setdefault(asset_id, start)
+
+    rotate = REDIS.set(
+        "playlist:rotated", "1", nx=True, ex=CONFIG.get("PLAYLIST_ROTATION", 300)
+    )
+    window = []
+    if not rotate:
+        window = [
+            int(asset_id)
+            for asset_id in REDIS.lrange("playlist:window", 0, -1)
+            if int(asset_id) in by_id
+        ][:max_pages]
+    previous = set(window)
+
+    for asset_id in sorted(passes, key=lambda i: (passes[i], i)):
+        if len(window) >= max_pages:
+            break
+        if asset_id not in previous:
+            window.append(asset_id)
+
+    # everything that got into the window just now has had its turn
+    weights = asset_weights(assets)
+    for asset_id in set(window) - previous:
+        passes[asset_id] += 1 / weights[asset_id]
+
+    p = REDIS.pipeline()
+    p.delete("playlist:pass", "playlist:window")
+    p.hset("playlist:pass", mapping=passes)
+    p.rpush("playlist:window", *window)
+    p.execute()
+
+    return [by_id[asset_id] for asset_id in window]
@@ -0,0 +1,81 @@
+from time import time
+
+from conf import CONFIG
+
+from .redis import REDIS
+
+# Play counts are kept in one hash per hour, with a field per asset
+# and room. Distinct devices per asset and hour are kept in a
+# HyperLogLog, which needs only a few hundred bytes per key. Both get
+# updated for every proof of play we receive, so reading statistics
+# never has to look at the proofs themselves.
+OTHER_ROOM = "other"
+
+
+def _hour(ts):
+    return int(ts // 3600 * 3600)
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def room_by_device():
+    return {room["device_id"]: room["name"] for room in CONFIG["ROOMS"]}
+
+
+def record_plays(proofs):
+    if not proofs:
+        return
+
+    rooms = room_by_device()
+    expire = CONFIG.get("STATS_RETENTION_HOURS", 48) * 3600
+    p = REDIS.pipeline(transaction=False)
+    for proof in proofs:
+        hour = _hour(proof["ts"])
+        room = rooms.get(proof["device_id"], OTHER_ROOM)
+        p.hincrby(f"stats:plays:{hour}", f"{proof['asset_id']}|{room}", 1)
+        p.expire(f"stats:plays:{hour}", expire)
+        p.pfadd(f"stats:devices:{proof['asset_id']}:{hour}", proof["device_id"])
+        p.expire(f"stats:devices:{proof['asset_id']}:{hour}", expire)
+    p.execute()
+
+
+def get_play_stats(hours=24):
+    """Aggregate play counts of the last n hours per asset, room and
+    hour, including the approximate number of distinct devices which
+    have shown each asset."""
+    now = _hour(time())
+    hours = min(hours, CONFIG.get("STATS_RETENTION_HOURS", 48))
+    hour_list = [now - i * 3600 for i in range(hours)]
+
+    p = REDIS.pipeline(transaction=False)
+    for hour in hour_list:
+        p.hgetall(f"stats:plays:{hour}")
+    counts = p.execute()
+
+    assets = {}
+    rooms = {}
+    per_hour = {}
+    for hour, fields in zip(hour_list, counts):
+        per_hour[hour] = 0
+        for field, count in fields.items():
+            asset_id, room = _decode(field).split("|", 1)
+            count = int(count)
+            asset = assets.setdefault(asset_id, {"plays": 0, "rooms": {}})
+            asset["plays"] += count
+            asset["rooms"][room] = asset["rooms"].get(room, 0) + count
+            rooms[room] = rooms.get(room, 0) + count
+            per_hour[hour] += count
+
+    p = REDIS.pipeline(transaction=False)
+    for asset_id in assets:
+        p.pfcount(*[f"stats:devices:{asset_id}:{hour}" for hour in hour_list])
+    for asset, devices in zip(assets.values(), p.execute()):
+        asset["devices"] = devices
+
+    return {
+        "assets": assets,
+        "hours": per_hour,
+        "rooms": rooms,
+    }
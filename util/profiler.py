@@ -0,0 +1,111 @@
+import signal
+from collections import Counter
+from logging import getLogger
+from os import getpid
+from threading import Lock, Timer, current_thread, main_thread
+
+LOG = getLogger("Profiler")
+
+# A sampling profiler, which looks at the stack of the running code
+# every few milliseconds from a signal handler. With gevent, all
+# greenlets run in the main thread, so we see whatever view or
+# background job is running at that moment. The result is in the
+# "collapsed stacks" format, which flamegraph.pl and speedscope read.
+CLOCKS = {
+    # only counts while the process is using the CPU
+    "cpu": (signal.ITIMER_PROF, signal.SIGPROF),
+    # counts all the time, including waiting for I/O
+    "wall": (signal.ITIMER_REAL, signal.SIGALRM),
+}
+MAX_SECONDS = 120
+# /api/profile answers when the profile is done, which has to happen
+# before nginx gives up on the request (proxy_read_timeout 60)
+MAX_REQUEST_SECONDS = 50
+# sampling more often than this costs more than it tells us
+MIN_INTERVAL = 0.001
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+class Profiler:
+    _running = Lock()
+
+    def __init__(self, interval=0.005, clock="cpu"):
+        self.interval = interval
+        self.timer, self.signal = CLOCKS[clock]
+        self.stacks = Counter()
+        self.old_handler = None
+
+    def _sample(self, signum, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{frame.f_globals.get('__name__')}:{code.co_qualname}")
+            frame = frame.f_back
+        self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        if not self._running.acquire(blocking=False):
+            raise ProfilerBusy("the profiler is already running in this process")
+        try:
+            self.old_handler = signal.signal(self.signal, self._sample)
+        except ValueError:
+            # not in the main thread
+            self._running.release()
+            raise
+        try:
+            signal.setitimer(self.timer, self.interval, self.interval)
+        except Exception:
+            # invalid interval, for example
+            signal.signal(self.signal, self.old_handler)
+            self._running.release()
+            raise
+
+    def stop(self):
+        signal.setitimer(self.timer, 0, 0)
+        # handlers can only be changed from the main thread. If we are
+        # somewhere else, ours stays, but won't get called anymore.
+        if current_thread() is main_thread():
+            signal.signal(self.signal, self.old_handler)
+        self._running.release()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def collapsed(self):
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.stacks.most_common()
+        )
+
+
+def profile_to_file(seconds, path=None):
+    """Profile this process for some seconds in the background, then
+    write the result to a file. Returns the file name."""
+    path = path or f"/tmp/infobeamer-cms-profile-{getpid()}.txt"
+    profiler = Profiler()
+    profiler.start()
+
+    def done():
+        profiler.stop()
+        with open(path, "w") as f:
+            f.write(profiler.collapsed())
+        LOG.warning(f"wrote profile to {path}")
+
+    Timer(min(seconds, MAX_SECONDS), done).start()
+    return path
+
+
+def profile_on_signal(signum, frame):
+    # Send SIGUSR2 to a gunicorn *worker* process to profile it for 30
+    # seconds. Sending it to the master process makes gunicorn upgrade
+    # itself instead.
+    try:
+        profile_to_file(30)
+    except ProfilerBusy as e:
+        LOG.warning(str(e))
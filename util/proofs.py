@@ -0,0 +1,89 @@
+from json import dumps, loads
+from logging import getLogger
+from time import time
+
+from conf import CONFIG
+
+from .redis import REDIS
+
+LOG = getLogger("Proofs")
+
+LAST_SHOWN_COUNT = 10
+
+
+def parse_proofs(lines):
+    """Parse newline-delimited JSON proofs of play. Returns a list of
+    valid proofs and the number of rows which could not be parsed."""
+    proofs = []
+    invalid = 0
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            proof = loads(line)
+            proofs.append(
+                {
+                    "asset_id": int(proof["asset_id"]),
+                    "device_id": int(proof["device_id"]),
+                    "id": str(proof.get("id", "")),
+                    "ts": float(proof["ts"]),
+                }
+            )
+        except (ValueError, TypeError, KeyError):
+            invalid += 1
+    return proofs, invalid
+
+
+def store_proofs(proofs):
+    """Store proofs into one sorted set per device, scored by the time
+    the asset was shown. Everything gets written in a single round trip
+    to redis, old proofs get trimmed on the way. Returns the proofs we
+    did not know about yet, devices might send some of them twice."""
+    if not proofs:
+        return []
+
+    # we only keep the proofs of the last PROOF_WINDOW seconds
+    window = CONFIG.get("PROOF_WINDOW", 1200)
+    oldest = time() - window
+    p = REDIS.pipeline(transaction=False)
+    for proof in proofs:
+        p.zadd(
+            f"proofs:{proof['device_id']}", {dumps(proof, sort_keys=True): proof["ts"]}
+        )
+    for device_id in {proof["device_id"] for proof in proofs}:
+        p.zremrangebyscore(f"proofs:{device_id}", "-inf", oldest)
+        p.expire(f"proofs:{device_id}", window)
+    added = p.execute()[: len(proofs)]
+    return [proof for proof, new in zip(proofs, added) if new and proof["ts"] > oldest]
+
+
+def get_last_shown(compute):
+    """Return the last assets shown per room. The result of compute()
+    gets stored in redis and shared by all workers for LAST_SHOWN_TTL
+    seconds, so only one request in that time has to compute it."""
+    cached = REDIS.get("proofs:last")
+    if cached is not None:
+        return loads(cached)
+
+    ttl = CONFIG.get("LAST_SHOWN_TTL", 10)
+    if not REDIS.set("lock:proofs:last", "1", nx=True, ex=ttl):
+        # someone else is computing it right now. Do it ourselves
+        # anyway instead of waiting, but don't store the result.
+        return compute(get_room_proofs())
+
+    result = compute(get_room_proofs())
+    REDIS.set("proofs:last", dumps(result), ex=ttl)
+    return result
+
+
+def get_room_proofs():
+    """Newest proofs per room, ordered newest first."""
+    p = REDIS.pipeline(transaction=False)
+    for room in CONFIG["ROOMS"]:
+        # fetch a few more, in case some of them are for deleted assets
+        p.zrevrange(f"proofs:{room['device_id']}", 0, LAST_SHOWN_COUNT * 3)
+    return {
+        room["name"]: [loads(row) for row in rows]
+        for room, rows in zip(CONFIG["ROOMS"], p.execute())
+    }
@@ -0,0 +1,141 @@
+from logging import getLogger
+from time import sleep, time
+
+from conf import CONFIG
+
+from .redis import REDIS
+
+LOG = getLogger("RateLimit")
+
+# Token buckets live in redis, so they are shared by all workers on all
+# nodes. Each bucket holds up to BURST tokens and gets refilled with
+# PER_MINUTE tokens per minute. The script also counts allowed and
+# rejected requests per bucket class in the "ratelimit:stats" hash, the
+# prometheus collector in frontend.py exports those.
+DEFAULT_LIMITS = {
+    # per logged in user and per client ip, for routes which talk to
+    # info-beamer
+    "user": {"BURST": 20, "PER_MINUTE": 10},
+    "ip": {"BURST": 40, "PER_MINUTE": 20},
+    # global, per upstream endpoint class, for everything we send to the
+    # info-beamer API
+    "upstream:read": {"BURST": 120, "PER_MINUTE": 120},
+    "upstream:write": {"BURST": 60, "PER_MINUTE": 60},
+    "upstream:adhoc": {"BURST": 30, "PER_MINUTE": 30},
+    "upstream:node": {"BURST": 100, "PER_MINUTE": 60},
+    # not sent to info-beamer by itself, paces the downloads of the
+    # cache warm-up after a deploy, which also take upstream:read tokens
+    "upstream:warmup": {"BURST": 10, "PER_MINUTE": 20},
+}
+
+TOKEN_BUCKET = REDIS.register_script(
+    """
+local burst = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local result = "rejected"
+if tokens >= 1 then
+    tokens = tokens - 1
+    result = "allowed"
+end
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "ts", ARGV[3])
+redis.call("EXPIRE", KEYS[1], math.ceil(burst / rate) + 1)
+redis.call("HINCRBY", KEYS[2], ARGV[4] .. "|" .. result, 1)
+return {result, tostring(tokens)}
+"""
+)
+
+
+class RateLimited(Exception):
+    def __init__(self, bucket, retry_after):
+        super().__init__(f"rate limit for {bucket} exceeded")
+        self.retry_after = retry_after
+
+
+def get_limit(cls):
+    return DEFAULT_LIMITS.get(cls, {}) | CONFIG.get("RATE_LIMITS", {}).get(cls, {})
+
+
+def take_token(cls, name=None):
+    """Take a token from the bucket of the given class, which is
+    shared by all requests with the same name. Raises RateLimited
+    if the bucket is empty. If redis fails, we let the request pass."""
+    limit = get_limit(cls)
+    if not limit.get("BURST"):
+        return
+
+    rate = limit["PER_MINUTE"] / 60
+    key = f"ratelimit:{cls}" if name is None else f"ratelimit:{cls}:{name}"
+    try:
+        result, tokens = TOKEN_BUCKET(
+            keys=[key, "ratelimit:stats"],
+            args=[limit["BURST"], rate, time(), cls],
+        )
+    except Exception as e:
+        LOG.warning(f"could not check rate limit {key}: {e!r}")
+        return
+
+    if result == b"rejected":
+        raise RateLimited(key, int((1 - float(tokens)) / rate) + 1)
+
+
+def with_backoff(fn, *args, attempts=3):
+    """Call fn, and if the upstream rate limit has been hit, wait as long
+    as the bucket needs to refill and try again. For background jobs,
+    requests should get their 429 instead."""
+    for attempt in range(attempts):
+        try:
+            return fn(*args)
+        except RateLimited as e:
+            if attempt == attempts - 1:
+                raise
+            LOG.warning(f"{e}, retrying in {e.retry_after} seconds")
+            sleep(e.retry_after)
+
+
+def upstream_class(method, ep):
+    if ep.startswith("adhoc/"):
+        return "upstream:adhoc"
+    if ep.startswith("device/") and "/node/" in ep:
+        return "upstream:node"
+    if method == "GET":
+        return "upstream:read"
+    return "upstream:write"
+
+
+def get_rate_limit_stats():
+    """Returns the configured limits, the number of allowed and
+    rejected requests per class and the tokens left in the global
+    buckets."""
+    stats = {}
+    for field, count in REDIS.hgetall("ratelimit:stats").items():
+        cls, result = field.decode().rsplit("|", 1)
+        stats.setdefault(cls, {"allowed": 0, "rejected": 0})[result] = int(count)
+
+    classes = sorted(set(DEFAULT_LIMITS) | set(CONFIG.get("RATE_LIMITS", {})))
+    p = REDIS.pipeline(transaction=False)
+    for cls in classes:
+        p.hmget(f"ratelimit:{cls}", "tokens", "ts")
+    buckets = p.execute()
+
+    result = {}
+    for cls, (tokens, ts) in zip(classes, buckets):
+        limit = get_limit(cls)
+        if not limit.get("BURST"):
+            continue
+        if tokens is None:
+            tokens = limit["BURST"]
+        else:
+            refill = max(0, time() - float(ts)) * limit["PER_MINUTE"] / 60
+            tokens = min(limit["BURST"], float(tokens) + refill)
+        result[cls] = {
+            "burst": limit["BURST"],
+            "per_minute": limit["PER_MINUTE"],
+            "tokens": tokens if cls.startswith("upstream:") else None,
+            **stats.get(cls, {"allowed": 0, "rejected": 0}),
+        }
+    return result
@@ -0,0 +1,91 @@
+from logging import getLogger
+from os.path import abspath, dirname, getmtime, join
+
+from .events import publish_event
+from .redis import REDIS
+
+BASE_DIR = dirname(dirname(abspath(__file__)))
+# RELEASE gets written by mkrelease.py at deploy time,
+# .bundlewrap_git_deploy by bundlewrap
+RELEASE_FILES = ("RELEASE", ".bundlewrap_git_deploy")
+LOG = getLogger("Release")
+
+
+def _read(path):
+    with open(join(BASE_DIR, path)) as f:
+        return f.read().strip()
+
+
+def _git_revision():
+    # Read the revision directly from the repository instead of running
+    # git, we do this in every process.
+    head = _read(".git/HEAD")
+    if not head.startswith("ref: "):
+        return head
+    ref = head[len("ref: ") :]  # noqa: E203
+    try:
+        return _read(join(".git", ref))
+    except FileNotFoundError:
+        for line in _read(".git/packed-refs").splitlines():
+            if line.endswith(f" {ref}"):
+                return line.split()[0]
+    raise ValueError(f"could not resolve {ref}")
+
+
+def determine_release():
+    """Returns the release and when it was deployed. mkrelease.py
+    writes the deploy time into the RELEASE file, otherwise we use the
+    modification time of the file the release was read from."""
+    for path in RELEASE_FILES:
+        try:
+            fields = _read(path).split()
+            if len(fields) > 1:
+                return fields[0][:8], float(fields[1])
+            return fields[0][:8], getmtime(join(BASE_DIR, path))
+        except Exception:
+            pass
+    try:
+        return _git_revision()[:8], 0
+    except Exception:
+        LOG.warning("could not determine release, using 'unknown'")
+        return "unknown", 0
+
+
+# Sets the release, unless the one in redis was deployed later. That
+# happens while old and new workers run side by side during a deploy,
+# or while nodes get deployed one after the other. Returns the previous
+# release if it was replaced.
+SET_RELEASE = REDIS.register_script(
+    """
+local deployed = tonumber(redis.call("GET", KEYS[2]) or "0")
+if tonumber(ARGV[2]) < deployed then
+    return false
+end
+local previous = redis.call("GET", KEYS[1])
+redis.call("SET", KEYS[1], ARGV[1])
+redis.call("SET", KEYS[2], ARGV[2])
+return previous or ""
+"""
+)
+
+
+def announce_release(release, deployed):
+    """Make the given release the current one, if it is the newest one
+    we know about. Clients which know about an older release will
+    reload."""
+    previous = SET_RELEASE(
+        keys=["release", "release:deployed"], args=[release, deployed]
+    )
+    if previous and previous.decode() != release:
+        LOG.warning(f"release changed from {previous.decode()} to {release}")
+        publish_event("reload", release=release)
+
+
+def get_current_release():
+    release = REDIS.get("release")
+    return release.decode() if release is not None else RELEASE
+
+
+# Determined once per process. If gunicorn runs with --preload, this
+# happens once in the master process.
+RELEASE, DEPLOYED = determine_release()
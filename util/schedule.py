@@ -0,0 +1,79 @@
+from bisect import bisect_right
+from heapq import merge
+from itertools import islice
+
+
+class LiveSchedule:
+    """Index of a list of assets by their starts and ends timestamps.
+
+    Assets without any times are always live and kept in one list.
+    Assets with times are kept as (start, end, index) intervals, sorted
+    by start, so finding the ones which have started by a given time is
+    a binary search. All start and end times are also collected into a
+    sorted list of transitions, for looking up when the live set
+    changes next. The live set only changes at those transitions, so
+    it is computed once per segment between two transitions and
+    remembered. Memory use is linear in the number of assets, plus the
+    segments which have been looked up.
+    """
+
+    def __init__(self, assets):
+        self.assets = assets
+        self.always = []
+        intervals = []
+        for idx, asset in enumerate(assets):
+            if asset.starts is None and asset.ends is None:
+                self.always.append(idx)
+                continue
+            if asset.starts is not None and asset.ends is not None:
+                if asset.starts > asset.ends:
+                    # never live
+                    continue
+            # Assets are live from starts until (and including) ends,
+            # so they expire one second after ends.
+            intervals.append(
+                (
+                    asset.starts if asset.starts is not None else float("-inf"),
+                    asset.ends + 1 if asset.ends is not None else float("inf"),
+                    idx,
+                )
+            )
+
+        intervals.sort()
+        self.intervals = intervals
+        self.starts = [start for start, _, _ in intervals]
+        self.transitions = sorted(
+            {ts for start, end, _ in intervals for ts in (start, end)}
+            - {float("-inf"), float("inf")}
+        )
+        self._segments = {}
+
+    def live_at(self, ts):
+        segment = bisect_right(self.transitions, ts)
+        live = self._segments.get(segment)
+        if live is None:
+            live = self._segments[segment] = self._compute_live_at(ts)
+        return live
+
+    def _compute_live_at(self, ts):
+        started = islice(self.intervals, bisect_right(self.starts, ts))
+        timed = sorted(idx for _, end, idx in started if end > ts)
+        return [self.assets[idx] for idx in merge(self.always, timed)]
+
+    def next_transition(self, ts):
+        idx = bisect_right(self.transitions, ts)
+        if idx < len(self.transitions):
+            return self.transitions[idx]
+        return None
+
+
+_cache = (None, None)
+
+
+def get_schedule(version, load_assets):
+    """Returns a LiveSchedule for the assets load_assets() returns. It
+    only gets rebuilt if the version of the asset list has changed."""
+    global _cache
+    if version is None or _cache[0] != version:
+        _cache = (version, LiveSchedule(load_assets()))
+    return _cache[1]
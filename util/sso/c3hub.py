@@ -1,7 +1,9 @@
-from flask import current_app as app
-from requests import get as get
+from logging import getLogger
 
-from conf import CONFIG
+from conf import CONFIG, is_no_limit_user
+from util.sso.client import sso_request
+
+LOG = getLogger("SSO-C3Hub")
 
 
 def get_c3hub_userid(userinfo_json):
@@ -13,21 +15,23 @@ def get_c3hub_username(userinfo_json):
 
 
 def check_c3hub_no_limit(userinfo_json):
-    return f"c3hub:{userinfo_json['username'].lower()}" in CONFIG["NO_LIMIT_USERS"]
+    return is_no_limit_user(f"c3hub:{userinfo_json['username'].lower()}")
 
 
 def c3hub_badge_after_confirm(asset):
     if "badge_claim_url" not in CONFIG["oauth2_providers"]["c3hub"]:
         return
 
-    username = asset.userid[len("c3hub:") :]  # noqa: E203
+    username = asset.userid.removeprefix("c3hub:")
     try:
-        r = get(
-            CONFIG["oauth2_providers"]["c3voc"]["badge_claim_url"].format(
+        r = sso_request(
+            "c3hub",
+            "badge",
+            "GET",
+            CONFIG["oauth2_providers"]["c3hub"]["badge_claim_url"].format(
                 username=username
             ),
-            timeout=5,
         )
         r.raise_for_status()
     except Exception as e:
-        app.logger.error(f"Failed to get badge for user {username}: {e!r}")
+        LOG.error(f"Failed to get badge for user {username}: {e!r}")
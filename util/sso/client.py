@@ -0,0 +1,113 @@
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+from time import monotonic
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from conf import CONFIG, on_config_reload
+from util.redis import REDIS
+
+LOG = getLogger("SSO")
+
+# All requests to the SSO providers go through one session per worker,
+# so logins reuse the TLS connections to the token and userinfo
+# endpoints. Every request has a timeout, a slow provider must not keep
+# greenlets busy forever. How long requests take is recorded in redis,
+# per provider and endpoint, like the other histograms.
+ENDPOINTS = ("token", "userinfo", "badge")
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+SESSION = requests.Session()
+# Hooks (updating asset names after a login, claiming badges after
+# a confirmation) don't need to finish before we answer the request.
+HOOKS = None
+_sizes = None
+
+
+@on_config_reload
+def configure():
+    global HOOKS, _sizes
+    sizes = CONFIG.get("SSO_POOL_SIZE", 10), CONFIG.get("SSO_HOOK_WORKERS", 4)
+    if sizes == _sizes:
+        # keep the open connections
+        return
+    pool_size, workers = _sizes = sizes
+    SESSION.mount("https://", HTTPAdapter(pool_maxsize=pool_size))
+    # hooks which have been submitted already still run in the old pool
+    if HOOKS is not None:
+        HOOKS.shutdown(wait=False)
+    HOOKS = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sso-hook")
+
+
+configure()
+
+
+def _observe(provider, endpoint, seconds, ok):
+    key = f"histogram:sso_request_seconds:{provider}:{endpoint}"
+    try:
+        p = REDIS.pipeline(transaction=False)
+        for le in BUCKETS:
+            if seconds <= le:
+                p.hincrby(key, str(le), 1)
+        p.hincrby(key, "+Inf", 1)
+        p.hincrbyfloat(key, "sum", seconds)
+        if not ok:
+            p.hincrby("sso:errors", f"{provider}:{endpoint}", 1)
+        p.execute()
+    except Exception as e:
+        LOG.warning(f"could not record sso request time: {e!r}")
+
+
+def sso_request(provider, endpoint, method, url, **kwargs):
+    kwargs.setdefault(
+        "timeout",
+        (CONFIG.get("SSO_CONNECT_TIMEOUT", 2), CONFIG.get("SSO_READ_TIMEOUT", 5)),
+    )
+    start = monotonic()
+    ok = False
+    try:
+        r = SESSION.request(method, url, **kwargs)
+        ok = r.status_code < 500
+        return r
+    finally:
+        _observe(provider, endpoint, monotonic() - start, ok)
+
+
+def run_hook(name, fn, *args):
+    def run():
+        try:
+            fn(*args)
+        except Exception:
+            LOG.exception(f"{name} failed")
+
+    HOOKS.submit(run)
+
+
+def get_sso_stats():
+    """Request time histograms and error counts of all configured
+    providers, by (provider, endpoint)."""
+    names = [
+        (provider, endpoint)
+        for provider in CONFIG["oauth2_providers"]
+        for endpoint in ENDPOINTS
+    ]
+    p = REDIS.pipeline(transaction=False)
+    for provider, endpoint in names:
+        p.hgetall(f"histogram:sso_request_seconds:{provider}:{endpoint}")
+    p.hgetall("sso:errors")
+    *histograms, errors = p.execute()
+    errors = {k.decode(): int(v) for k, v in errors.items()}
+
+    result = {}
+    for (provider, endpoint), values in zip(names, histograms):
+        if not values:
+            continue
+        values = {k.decode(): float(v) for k, v in values.items()}
+        result[provider, endpoint] = {
+            "buckets": [(str(le), values.get(str(le), 0)) for le in BUCKETS]
+            + [("+Inf", values.get("+Inf", 0))],
+            "sum": values.get("sum", 0),
+            "errors": errors.get(f"{provider}:{endpoint}", 0),
+        }
+    return result
@@ -1,7 +1,7 @@
 from datetime import datetime, timezone
 from logging import getLogger
 
-from conf import CONFIG
+from conf import is_admin_user, is_no_limit_user
 
 LOG = getLogger("SSO-Github")
 
@@ -29,8 +29,8 @@ def check_github_allowed_login(userinfo_json):
 
 
 def check_github_is_admin(userinfo_json):
-    return f"github:{userinfo_json['login'].lower()}" in CONFIG["ADMIN_USERS"]
+    return is_admin_user(f"github:{userinfo_json['login'].lower()}")
 
 
 def check_github_no_limit(userinfo_json):
-    return f"github:{userinfo_json['login'].lower()}" in CONFIG["NO_LIMIT_USERS"]
+    return is_no_limit_user(f"github:{userinfo_json['login'].lower()}")
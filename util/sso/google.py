@@ -1,4 +1,4 @@
-from conf import CONFIG
+from conf import is_admin_user, is_no_limit_user
 
 
 def get_google_userid(userinfo_json):
@@ -10,8 +10,8 @@ def get_google_username(userinfo_json):
 
 
 def check_google_is_admin(userinfo_json):
-    return f"google:{userinfo_json['email'].lower()}" in CONFIG["ADMIN_USERS"]
+    return is_admin_user(f"google:{userinfo_json['email'].lower()}")
 
 
 def check_google_no_limit(userinfo_json):
-    return f"google:{userinfo_json['email'].lower()}" in CONFIG["NO_LIMIT_USERS"]
+    return is_no_limit_user(f"google:{userinfo_json['email'].lower()}")
@@ -0,0 +1,65 @@
+from json import load
+from logging import getLogger
+from os import path
+
+from flask import url_for
+
+from conf import CONFIG
+
+from .release import BASE_DIR
+
+LOG = getLogger("Static")
+
+STATIC_PATH = path.join(BASE_DIR, CONFIG.get("STATIC_PATH", "static"))
+# mkstatic.py writes the bundles and the manifest in here
+DIST_DIR = "dist"
+MANIFEST_FILE = path.join(STATIC_PATH, DIST_DIR, "manifest.json")
+
+# Files which get concatenated into one bundle, in this order.
+BUNDLES = {
+    "base.css": ["bootstrap.min.css", "notyf.min.css", "app.css"],
+    "base.js": ["vue.min.js", "vue-resource.min.js", "notyf.min.js"],
+    "dashboard.bundle.js": ["vue-router.min.js", "vuex.min.js", "dashboard.js"],
+}
+# Files which get a content hash in their name, but no bundle. Files
+# referenced from javascript (like placeholder.png) must not be in here.
+FINGERPRINTED = [
+    "event-logo.png",
+    "index.js",
+    "interrupt.js",
+    "logo.png",
+    "moderate.js",
+    "slideshow.css",
+    "slideshow.js",
+]
+
+
+def load_manifest():
+    try:
+        with open(MANIFEST_FILE) as f:
+            manifest = load(f)
+    except FileNotFoundError:
+        LOG.info("no static manifest found, serving unbundled files")
+        return {}
+    LOG.info(f"loaded static manifest with {len(manifest)} files")
+    return manifest
+
+
+MANIFEST = load_manifest()
+
+
+def fingerprint_static_url(endpoint, values):
+    """url_defaults callback, makes url_for("static", ...) use the
+    fingerprinted file if there is one."""
+    if endpoint == "static" and values.get("filename") in MANIFEST:
+        values["filename"] = MANIFEST[values["filename"]]
+        # the file name changes with its content anyway
+        values.pop("v", None)
+
+
+def bundle_urls(name, version=None):
+    """URLs of the files of a bundle. That's the bundle itself if it
+    has been built, otherwise its parts."""
+    if name in MANIFEST:
+        return [url_for("static", filename=name)]
+    return [url_for("static", filename=part, v=version) for part in BUNDLES[name]]
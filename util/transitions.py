@@ -0,0 +1,83 @@
+from time import time
+
+from .redis import REDIS
+
+# When an asset entered which state is kept in one hash per asset.
+# Durations between those get observed into histograms, which live in
+# redis, so every worker and the syncer can add to them. Buckets are
+# stored cumulative, the way prometheus wants them.
+TRANSITIONS_TTL = 30 * 86400
+HISTOGRAMS = {
+    "moderation_review_wait_seconds": (
+        "Time from requesting a review until the moderation decision",
+        (60, 300, 600, 1800, 3600, 7200, 21600, 86400),
+    ),
+    "moderation_sync_delay_seconds": (
+        "Time from confirmation (or start time) until the asset is on the setups",
+        (10, 30, 60, 120, 300, 600, 1800, 3600),
+    ),
+}
+
+
+def record_transition(asset_id, state, ts=None):
+    """Remember when an asset entered a state. Returns when it entered
+    the previous states."""
+    ts = time() if ts is None else ts
+    key = f"transitions:{asset_id}"
+    p = REDIS.pipeline(transaction=False)
+    p.hgetall(key)
+    p.hset(key, state, ts)
+    p.expire(key, TRANSITIONS_TTL)
+    previous, _, _ = p.execute()
+    return {k.decode(): float(v) for k, v in previous.items()}
+
+
+def get_transitions(asset_ids):
+    p = REDIS.pipeline(transaction=False)
+    for asset_id in asset_ids:
+        p.hgetall(f"transitions:{asset_id}")
+    return {
+        asset_id: {k.decode(): float(v) for k, v in transitions.items()}
+        for asset_id, transitions in zip(asset_ids, p.execute())
+    }
+
+
+def oldest_age(asset_ids, state):
+    """Seconds since the asset which has been in the given state for
+    the longest time entered it."""
+    entered = [
+        transitions[state]
+        for transitions in get_transitions(asset_ids).values()
+        if state in transitions
+    ]
+    if not entered:
+        return None
+    return time() - min(entered)
+
+
+def observe(name, value):
+    _, buckets = HISTOGRAMS[name]
+    p = REDIS.pipeline(transaction=False)
+    for le in buckets:
+        if value <= le:
+            p.hincrby(f"histogram:{name}", str(le), 1)
+    p.hincrby(f"histogram:{name}", "+Inf", 1)
+    p.hincrbyfloat(f"histogram:{name}", "sum", value)
+    p.execute()
+
+
+def get_histograms():
+    p = REDIS.pipeline(transaction=False)
+    for name in HISTOGRAMS:
+        p.hgetall(f"histogram:{name}")
+
+    result = {}
+    for (name, (doc, buckets)), values in zip(HISTOGRAMS.items(), p.execute()):
+        values = {k.decode(): float(v) for k, v in values.items()}
+        result[name] = {
+            "doc": doc,
+            "buckets": [(str(le), values.get(str(le), 0)) for le in buckets]
+            + [("+Inf", values.get("+Inf", 0))],
+            "sum": values.get("sum", 0),
+        }
+    return result
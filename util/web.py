@@ -0,0 +1,57 @@
+from functools import wraps
+
+from flask import abort, g, jsonify, redirect, request, session, url_for
+
+from . import State, get_assets
+from .ratelimit import take_token
+from .sso import DEFAULT_ADMIN_SSO_PROVIDER, DEFAULT_SSO_PROVIDER
+
+# Helpers which only make sense within a request, kept apart from the
+# rest of util, so the syncer and scheduler don't have to load flask.
+
+
+def error(msg):
+    return jsonify(error=msg), 400
+
+
+def login_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not g.userid:
+            session["redirect_after_login"] = request.url
+            return redirect(url_for("login", provider=DEFAULT_SSO_PROVIDER))
+        return f(*args, **kwargs)
+
+    return decorated_function
+
+
+def admin_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not g.userid:
+            session["redirect_after_login"] = request.url
+            return redirect(url_for("login", provider=DEFAULT_ADMIN_SSO_PROVIDER))
+        if not g.user_is_admin:
+            abort(401)
+        return f(*args, **kwargs)
+
+    return decorated_function
+
+
+def rate_limited(f):
+    # for routes which need the info-beamer API. Admins are exempt.
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not g.user_is_admin:
+            take_token("ip", request.remote_addr)
+            if g.userid:
+                take_token("user", g.userid)
+        return f(*args, **kwargs)
+
+    return decorated_function
+
+
+def get_user_assets():
+    return [
+        a for a in get_assets() if a.userid == g.userid and a.state != State.DELETED
+    ]